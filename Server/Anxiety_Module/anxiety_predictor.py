@@ -55,7 +55,7 @@ def create_temp_file_from_upload(upload_file):
     return temp_file.name
 
 
-def predict_anxiety(audio, facial1, facial2, facial3, transcript):
+def predict_anxiety(audio, facial1, facial2, facial3, transcript, progress=None):
     """
     Predict anxiety type from uploaded files without saving them permanently
 
@@ -65,6 +65,7 @@ def predict_anxiety(audio, facial1, facial2, facial3, transcript):
         facial2: UploadFile - Second facial image
         facial3: UploadFile - Third facial image
         transcript: UploadFile - Transcript file
+        progress: Optional callable, called with each stage name as it starts
 
     Returns:
         dict: Prediction result with success status and message
@@ -73,6 +74,8 @@ def predict_anxiety(audio, facial1, facial2, facial3, transcript):
 
     try:
         # Create temporary files for processing
+        if progress is not None:
+            progress("decode")
         audio_path = create_temp_file_from_upload(audio)
         facial1_path = create_temp_file_from_upload(facial1)
         facial2_path = create_temp_file_from_upload(facial2)
@@ -90,6 +93,8 @@ def predict_anxiety(audio, facial1, facial2, facial3, transcript):
         facial_paths = [facial1_path, facial2_path, facial3_path]
 
         # Extract features
+        if progress is not None:
+            progress("preprocess")
         audio_df = extract_audio_features(audio_path)
         facial_df = extract_facial_features(facial_paths)
         transcript_df = extract_transcript_features(transcript_path)
@@ -144,6 +149,8 @@ def predict_anxiety(audio, facial1, facial2, facial3, transcript):
         print(f"✅ Final features shape: {final_features.shape}")
 
         # Load models when needed
+        if progress is not None:
+            progress("infer")
         model, label_encoder = load_models()
 
         # Predict
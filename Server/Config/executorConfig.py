@@ -0,0 +1,14 @@
+import os
+
+# Bounded executors for the CPU-heavy model endpoints (see executors.py).
+# WORKERS jobs of a family run at once, up to QUEUE more wait, and anything
+# beyond that is turned away with 503 + Retry-After.
+ANXIETY_WORKERS = int(os.getenv("ANXIETY_WORKERS", "1"))
+ANXIETY_QUEUE = int(os.getenv("ANXIETY_QUEUE", "4"))
+DEPRESSION_WORKERS = int(os.getenv("DEPRESSION_WORKERS", "1"))
+DEPRESSION_QUEUE = int(os.getenv("DEPRESSION_QUEUE", "2"))
+DEMENTIA_WORKERS = int(os.getenv("DEMENTIA_WORKERS", "2"))
+DEMENTIA_QUEUE = int(os.getenv("DEMENTIA_QUEUE", "8"))
+
+# Retry-After (seconds) before any job of a family has finished
+EXECUTOR_DEFAULT_RETRY_AFTER = float(os.getenv("EXECUTOR_DEFAULT_RETRY_AFTER", "10"))
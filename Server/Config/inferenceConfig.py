@@ -0,0 +1,30 @@
+import os
+
+# Cross-request dynamic batching of the torch models (see dynamic_batching.py).
+# A batch is run once it holds MAX_SIZE rows (texts / EEG segments) or its
+# first request has waited MAX_WAIT_MS, whichever comes first.
+DYNAMIC_BATCHING_ENABLED = os.getenv("DYNAMIC_BATCHING_ENABLED", "true").lower() == "true"
+BERT_BATCH_MAX_SIZE = int(os.getenv("BERT_BATCH_MAX_SIZE", "16"))
+BERT_BATCH_MAX_WAIT_MS = float(os.getenv("BERT_BATCH_MAX_WAIT_MS", "10"))
+CBRAMOD_BATCH_MAX_SIZE = int(os.getenv("CBRAMOD_BATCH_MAX_SIZE", "64"))  # 5 s EEG segments
+CBRAMOD_BATCH_MAX_WAIT_MS = float(os.getenv("CBRAMOD_BATCH_MAX_WAIT_MS", "20"))
+
+# Backend of the dementia BERT encoder (see Dementia_Models/speech_encoder.py):
+# "torch" (fp32 PyTorch), "onnx" (ONNX Runtime fp32) or "onnx-int8" (ONNX
+# Runtime, dynamically quantized int8). The ONNX models are written by
+# `python -m Dementia_Models.export_encoder`; check a backend's drift and
+# speech model agreement with `python -m Dementia_Models.encoder_parity`
+# before switching to it.
+ENCODER_BACKEND = os.getenv("DEMENTIA_ENCODER_BACKEND", "torch")
+ENCODER_ONNX_DIR = os.getenv("DEMENTIA_ENCODER_ONNX_DIR", "./Dementia_Models/encoder_onnx")
+ENCODER_ONNX_THREADS = int(os.getenv("DEMENTIA_ENCODER_ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+
+# Memoization of the dementia speech branch (see Dementia_Models/speech_cache.py):
+# linguistic features, per-transcript embeddings and speech model probabilities
+SPEECH_CACHE_ENABLED = os.getenv("SPEECH_CACHE_ENABLED", "true").lower() == "true"
+SPEECH_CACHE_MEMORY_ITEMS = int(os.getenv("SPEECH_CACHE_MEMORY_ITEMS", "1024"))
+SPEECH_CACHE_DIR = os.getenv("SPEECH_CACHE_DIR", "./cache/speech")
+SPEECH_CACHE_DISK_MB = int(os.getenv("SPEECH_CACHE_DISK_MB", "128"))
+
+# Most assessments one /api/dementia/predict/batch request may carry
+DEMENTIA_BATCH_MAX_ITEMS = int(os.getenv("DEMENTIA_BATCH_MAX_ITEMS", "256"))
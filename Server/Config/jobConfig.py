@@ -0,0 +1,8 @@
+import os
+
+# Asynchronous job mode of the prediction endpoints (see jobs.py). The store
+# is a SQLite file so every worker process of serve.py sees every job.
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "./cache/jobs.sqlite3")
+JOB_TTL_S = float(os.getenv("JOB_TTL_S", "3600"))  # results kept this long after finishing
+JOB_EVENTS_POLL_S = float(os.getenv("JOB_EVENTS_POLL_S", "0.5"))
+JOB_EVENTS_HEARTBEAT_S = float(os.getenv("JOB_EVENTS_HEARTBEAT_S", "15"))
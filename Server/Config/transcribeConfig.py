@@ -0,0 +1,93 @@
+import json
+import os
+
+# Settings chosen by `python -m Transcribe.autotune`, if it has been run on
+# this machine. Environment variables still take precedence.
+WHISPER_TUNED_CONFIG = os.getenv("WHISPER_TUNED_CONFIG", "./Config/whisper_tuned.json")
+_tuned = {}
+if os.path.exists(WHISPER_TUNED_CONFIG):
+    with open(WHISPER_TUNED_CONFIG) as f:
+        _tuned = json.load(f)
+
+# Local Whisper (faster-whisper) model pool
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", _tuned.get("model_size", "medium"))
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", _tuned.get("compute_type", "int8"))
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", _tuned.get("cpu_threads", 0)))  # 0 = library default
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", _tuned.get("num_workers", 1)))
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", _tuned.get("beam_size", 5)))
+# Batched decoding detects the language once per batch, so it is fixed
+# (Azure is configured for en-US too)
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+WHISPER_REPLICAS = int(os.getenv("WHISPER_REPLICAS", "1"))
+WHISPER_WARM_ON_STARTUP = os.getenv("WHISPER_WARM_ON_STARTUP", "true").lower() == "true"
+
+# Azure Speech REST client
+AZURE_CONNECT_TIMEOUT = float(os.getenv("AZURE_CONNECT_TIMEOUT", "3"))  # seconds
+AZURE_READ_TIMEOUT = float(os.getenv("AZURE_READ_TIMEOUT", "30"))  # seconds
+AZURE_MAX_CONNECTIONS = int(os.getenv("AZURE_MAX_CONNECTIONS", "10"))
+AZURE_BREAKER_FAILURES = int(os.getenv("AZURE_BREAKER_FAILURES", "3"))  # consecutive failures before opening
+AZURE_BREAKER_COOLDOWN = float(os.getenv("AZURE_BREAKER_COOLDOWN", "60"))  # seconds to skip Azure once open
+
+# Hedged transcription: start local Whisper once Azure runs slower than its
+# recent HEDGE_PERCENTILE latency, and keep whichever answers first
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "90"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))  # Azure latencies kept
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # before the percentile is trusted
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "8"))  # seconds, until then
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1"))  # seconds
+
+# Voice-activity detection (Silero, shipped with faster-whisper)
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "0.5"))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "700"))  # matches the [pause] threshold
+VAD_SPEECH_PAD_MS = int(os.getenv("VAD_SPEECH_PAD_MS", "200"))
+
+# WebSocket streaming transcription
+STREAM_MIN_NEW_AUDIO_S = float(os.getenv("STREAM_MIN_NEW_AUDIO_S", "0.5"))  # re-run VAD after this much new audio
+STREAM_MAX_SEGMENT_S = float(os.getenv("STREAM_MAX_SEGMENT_S", "25"))  # force a cut if nobody pauses
+
+# Cross-request batched Whisper decoding
+WHISPER_BATCH_ENABLED = os.getenv("WHISPER_BATCH_ENABLED", "true").lower() == "true"
+WHISPER_BATCH_WINDOW_MS = float(os.getenv("WHISPER_BATCH_WINDOW_MS", "50"))  # max wait for company
+WHISPER_BATCH_MAX_REQUESTS = int(os.getenv("WHISPER_BATCH_MAX_REQUESTS", "8"))
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))  # 30 s chunks per forward pass
+
+# Transcription result cache (keyed by audio hash + backend/model version)
+TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+TRANSCRIPT_CACHE_MEMORY_ITEMS = int(os.getenv("TRANSCRIPT_CACHE_MEMORY_ITEMS", "256"))
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "./cache/transcripts")
+TRANSCRIPT_CACHE_DISK_MB = int(os.getenv("TRANSCRIPT_CACHE_DISK_MB", "64"))
+
+# Cut silent spans out of the audio before Whisper sees it (word times are
+# mapped back onto the original recording, so pause markers are unchanged)
+VAD_TRIM_ENABLED = os.getenv("VAD_TRIM_ENABLED", "true").lower() == "true"
+
+# Long recordings: split at silences and decode chunks in parallel processes
+LONG_AUDIO_PROCESSES = int(os.getenv("LONG_AUDIO_PROCESSES", "2"))  # 0 disables
+LONG_AUDIO_THRESHOLD_S = float(os.getenv("LONG_AUDIO_THRESHOLD_S", "180"))
+LONG_AUDIO_CHUNK_S = float(os.getenv("LONG_AUDIO_CHUNK_S", "60"))
+
+# Latency-budgeted model tiering: resident model sizes, smallest first. A
+# request that sends a latency budget is decoded first by the largest one
+# that fits it, and a low-confidence result is redone on a larger tier if
+# the budget allows. Requests without a budget always get WHISPER_MODEL_SIZE,
+# the top tier; a single size disables tiering.
+_TIER_ORDER = ["tiny", "base", "small", "medium", "large-v3"]
+_requested_tiers = [s.strip() for s in os.getenv("WHISPER_TIERS", "tiny,base,small").split(",") if s.strip()]
+WHISPER_TIERS = [
+    size for size in _TIER_ORDER[:_TIER_ORDER.index(WHISPER_MODEL_SIZE)] if size in _requested_tiers
+] if WHISPER_MODEL_SIZE in _TIER_ORDER else []
+WHISPER_TIERS.append(WHISPER_MODEL_SIZE)
+# Starting real-time factor (decode seconds per audio second) of each tier;
+# refined from observed decodes as requests are served
+WHISPER_TIER_RTF = {
+    size: float(rtf)
+    for size, rtf in (item.split(":") for item in os.getenv(
+        "WHISPER_TIER_RTF", "tiny:0.03,base:0.06,small:0.15,medium:0.4,large-v3:0.8").split(",") if item)
+}
+# Budget for requests that do not send one; unset keeps them on the top tier
+TRANSCRIBE_LATENCY_BUDGET_S = (
+    float(os.environ["TRANSCRIBE_LATENCY_BUDGET_S"]) if os.getenv("TRANSCRIBE_LATENCY_BUDGET_S") else None
+)
+TIER_MIN_AVG_LOGPROB = float(os.getenv("TIER_MIN_AVG_LOGPROB", "-0.7"))  # below this, upgrade
+TIER_MAX_NO_SPEECH_PROB = float(os.getenv("TIER_MAX_NO_SPEECH_PROB", "0.5"))  # above this, upgrade
@@ -0,0 +1,6 @@
+import os
+
+# Resumable chunked uploads (see uploads.py)
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "./cache/uploads")
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "1024"))  # per upload
+UPLOAD_TTL_S = float(os.getenv("UPLOAD_TTL_S", "86400"))  # unused uploads are deleted after this
@@ -0,0 +1,157 @@
+"""
+Check the speech encoder backends against the embeddings the speech model is served.
+
+Run from the Server directory:
+
+    python -m Dementia_Models.encoder_parity --backends torch,onnx,onnx-int8
+
+For every row of the speech test set, the three cleaned transcripts are
+embedded the way predict_from_input used to: each text in its own
+PyTorch forward pass, averaged over last_hidden_state. A lone text has no
+padding, so that is the reference embedding. Each backend then encodes
+the same rows through SpeechEncoder, one assessment at a time (the
+latency of a request) and all together in length-sorted buckets, and
+the report shows:
+
+- drift: the largest absolute difference and lowest cosine similarity
+  of any embedding against the reference
+- agreement: the share of rows where speech_model, given the backend's
+  embeddings and the test set's linguistic features, predicts what it
+  predicts from the reference embeddings (and its accuracy on Severity)
+- timing: encoder seconds per assessment and for the bucketed run
+
+The fp32 backends must stay within --tolerance of the reference; the
+int8 backend, whose drift is expected, must keep a cosine similarity of
+at least --min-cosine. Every backend must reach --min-agreement. Exits
+non-zero if any backend fails.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from Config.inferenceConfig import BERT_BATCH_MAX_SIZE, ENCODER_ONNX_DIR, ENCODER_ONNX_THREADS
+from Dementia_Models import predict_dementia
+from Dementia_Models.linguistic_features import FEATURE_COLUMNS
+from Dementia_Models.speech_encoder import BACKENDS, TRANSCRIPTS, SpeechEncoder, load_backend
+
+TEST_SET = "./Dementia_Models/Dataset2/test_dataset_speech.csv"
+QUANTIZED = ("onnx-int8",)
+
+
+def reference_embedding(model, text):
+    inputs = predict_dementia.tokenizer([text], return_tensors="pt", truncation=True, padding=True, max_length=256)
+    with torch.no_grad():
+        outputs = model(**inputs)
+    return outputs.last_hidden_state.mean(dim=1).numpy()[0]
+
+
+def load_test_set(path, rows):
+    df = pd.read_csv(path)
+    if rows:
+        df = df.head(rows)
+    transcripts = [
+        [predict_dementia.clean_text(text) for text in row] for row in df[list(TRANSCRIPTS)].fillna("").values
+    ]
+    features = predict_dementia.scaler.transform(df[FEATURE_COLUMNS].values)
+    return transcripts, features, df["Severity"].values
+
+
+def drift(reference, candidate):
+    """Per-row max absolute difference and cosine similarity of two embedding blocks."""
+    reference = reference.reshape(-1, reference.shape[-1])
+    candidate = candidate.reshape(-1, candidate.shape[-1])
+    max_abs = np.abs(reference - candidate).max(axis=1)
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1) + 1e-12
+    )
+    return max_abs, cosine
+
+
+def speech_predictions(embeddings, features):
+    return predict_dementia.speech_model.predict(np.hstack((embeddings.reshape(len(features), -1), features)))
+
+
+def check_backend(name, assessments, features, labels, reference, reference_pred):
+    backend = predict_dementia.encoder_backend
+    if backend.name != name:
+        backend = load_backend(name, ENCODER_ONNX_DIR, ENCODER_ONNX_THREADS)
+    encoder = SpeechEncoder(predict_dementia.tokenizer, backend, max_length=256, max_batch_size=BERT_BATCH_MAX_SIZE)
+    encoder.warm()
+
+    started = time.perf_counter()
+    per_visit = np.stack([encoder.encode_transcripts(*row) for row in assessments])
+    visit_seconds = (time.perf_counter() - started) / len(assessments)
+
+    started = time.perf_counter()
+    bucketed = encoder.encode([text for row in assessments for text in row]).reshape(reference.shape)
+    bucketed_seconds = time.perf_counter() - started
+
+    # Both runs are held to the reference on their own
+    visit_abs, visit_cosine = drift(reference, per_visit)
+    bucketed_abs, bucketed_cosine = drift(reference, bucketed)
+    predictions = speech_predictions(per_visit, features)
+    return {
+        "backend": name,
+        "max_abs": float(max(visit_abs.max(), bucketed_abs.max())),
+        "min_cosine": float(min(visit_cosine.min(), bucketed_cosine.min())),
+        "agreement": float(np.mean(predictions == reference_pred)),
+        "accuracy": float(np.mean(predictions == labels)),
+        "visit_seconds": visit_seconds,
+        "bucketed_seconds": bucketed_seconds,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=TEST_SET)
+    parser.add_argument("--rows", type=int, default=0, help="Rows of the test set to check (0 for all)")
+    parser.add_argument("--backends", default="torch", help=f"Comma-separated, from {', '.join(BACKENDS)}")
+    parser.add_argument("--tolerance", type=float, default=1e-3,
+                        help="Largest absolute embedding difference allowed for the fp32 backends")
+    parser.add_argument("--min-cosine", type=float, default=0.98,
+                        help="Lowest cosine similarity allowed for the quantized backend")
+    parser.add_argument("--min-agreement", type=float, default=0.95,
+                        help="Lowest share of speech_model predictions that must match the reference")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    assessments, features, labels = load_test_set(args.data, args.rows)
+    print(f"Checking {len(assessments)} assessments from {args.data}")
+
+    model = predict_dementia.bert_model
+    if model is None:
+        model = load_backend("torch").model
+    started = time.perf_counter()
+    reference = np.stack([np.stack([reference_embedding(model, text) for text in row]) for row in assessments])
+    reference_seconds = (time.perf_counter() - started) / len(assessments)
+    reference_pred = speech_predictions(reference, features)
+    print(f"{'reference':>10}  accuracy={np.mean(reference_pred == labels):.3f}  {reference_seconds * 1000:.0f}ms/visit")
+
+    failed = []
+    for name in [b for b in args.backends.split(",") if b]:
+        result = check_backend(name, assessments, features, labels, reference, reference_pred)
+        print(f"{name:>10}  max|diff|={result['max_abs']:.2e}  min cosine={result['min_cosine']:.5f}"
+              f"  agreement={result['agreement']:.3f}  accuracy={result['accuracy']:.3f}"
+              f"  {result['visit_seconds'] * 1000:.0f}ms/visit"
+              f" ({reference_seconds / result['visit_seconds']:.1f}x)  bucketed={result['bucketed_seconds']:.2f}s")
+
+        within_drift = (
+            result["min_cosine"] >= args.min_cosine if name in QUANTIZED else result["max_abs"] <= args.tolerance
+        )
+        if not within_drift or result["agreement"] < args.min_agreement:
+            failed.append(name)
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)} outside the drift or agreement limits")
+        sys.exit(1)
+    print("OK: every backend is within the drift and agreement limits")
+
+
+if __name__ == "__main__":
+    main()
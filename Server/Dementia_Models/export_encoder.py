@@ -0,0 +1,96 @@
+"""
+Export the dementia BERT encoder to ONNX, in fp32 and dynamically quantized int8.
+
+Run from the Server directory:
+
+    python -m Dementia_Models.export_encoder
+
+bert-base-uncased is exported with dynamic batch and sequence axes, its
+only output being last_hidden_state (pooling stays in SpeechEncoder). The
+int8 model is the fp32 one with its weights quantized ahead of time and
+its activations quantized at run time (onnxruntime.quantization
+.quantize_dynamic). Both files go to DEMENTIA_ENCODER_ONNX_DIR, where
+the "onnx" and "onnx-int8" backends load them from. Check them with
+`python -m Dementia_Models.encoder_parity` before switching backends.
+"""
+import argparse
+import os
+
+import torch
+from transformers import BertModel, BertTokenizer
+
+from Config.inferenceConfig import ENCODER_ONNX_DIR
+from Dementia_Models.speech_encoder import BERT_MODEL_NAME, ONNX_FILES
+
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+class LastHiddenState(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.model(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+        ).last_hidden_state
+
+
+def export_fp32(path, opset):
+    tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
+    model = BertModel.from_pretrained(BERT_MODEL_NAME).eval()
+
+    # Two texts of different lengths, so padding is part of the traced graph
+    sample = tokenizer(
+        ["the boy is taking cookies", "the water is spilling over from the sink"],
+        return_tensors="pt",
+        padding=True,
+    )
+    with torch.inference_mode():
+        torch.onnx.export(
+            LastHiddenState(model),
+            tuple(sample[name] for name in INPUT_NAMES),
+            path,
+            input_names=INPUT_NAMES,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+
+def quantize_int8(source, path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, path, weight_type=QuantType.QInt8)
+
+
+def size_mb(path):
+    return os.path.getsize(path) / (1024 * 1024)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=ENCODER_ONNX_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    fp32_path = os.path.join(args.output_dir, ONNX_FILES["onnx"])
+    int8_path = os.path.join(args.output_dir, ONNX_FILES["onnx-int8"])
+
+    export_fp32(fp32_path, args.opset)
+    print(f"Exported {fp32_path} ({size_mb(fp32_path):.0f}MB)")
+
+    quantize_int8(fp32_path, int8_path)
+    print(f"Quantized {int8_path} ({size_mb(int8_path):.0f}MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import re
+from collections import Counter
+
+import numpy as np
+import spacy
+
+# The 13 linguistic features of the speech model, in the order its scaler expects
+FEATURE_COLUMNS = [
+    "TTR", "Brunet_Index", "Avg_Word_Length", "NOUN_ratio", "VERB_ratio", "PRONOUN_ratio",
+    "Subordinate_Clauses", "Parse_Tree_Depth", "Idea_Density", "Key_Elements_Described",
+    "Irrelevant_Details", "Pauses", "Repair_Rate",
+]
+
+# Cookie-theft picture description
+KEY_ELEMENTS = ["boy stealing cookies", "sink overflowing", "mother", "kitchen", "cookies"]
+IRRELEVANT_DETAILS = ["dog", "cat", "car", "tree"]
+
+FILLER_PATTERN = re.compile(r"\b(uh|um)\b")
+
+# Pipes none of the features read: POS comes from the tagger and attribute
+# ruler, sentences and dependencies from the parser
+UNUSED_PIPES = ("ner", "lemmatizer")
+
+
+def count_fillers(words):
+    """Number of "uh"/"um" in a token list, as FILLER_PATTERN finds them in the text."""
+    return len(FILLER_PATTERN.findall(" ".join(words).lower()))
+
+
+def get_parse_depth(sent):
+    depths = {token.i: 0 for token in sent}
+    for token in sent:
+        if token.head != token:
+            depths[token.i] = depths[token.head.i] + 1
+    return max(depths.values()) if depths else 0
+
+
+class LinguisticFeatureExtractor:
+    """
+    Computes the speech model's linguistic features from one spaCy parse.
+
+    The text is parsed once, with the unused pipes skipped, and the POS,
+    sentence-complexity and repair features all read that Doc; the
+    lexical features share one whitespace token list. The results are the
+    same as the per-feature functions the model was trained with.
+    """
+
+    def __init__(self, nlp=None, key_elements=KEY_ELEMENTS, irrelevant_details=IRRELEVANT_DETAILS):
+        self.nlp = nlp if nlp is not None else spacy.load("en_core_web_sm", exclude=list(UNUSED_PIPES))
+        self.key_elements = key_elements
+        self.irrelevant_details = irrelevant_details
+        # Skipped per call rather than removed, so a shared pipeline keeps them
+        self.disable = [name for name in UNUSED_PIPES if name in self.nlp.pipe_names]
+
+    def from_doc(self, text, doc, words=None, filler_count=None):
+        """
+        Args:
+            text (str): The transcript.
+            doc (spacy.tokens.Doc): Its parse.
+            words (list[str]): text.split(), if already known (see
+                predict_dementia.tokens_from_timing).
+            filler_count (int): Number of "uh"/"um", if already known.
+        Returns:
+            dict: One value per name in FEATURE_COLUMNS.
+        """
+        words = text.split() if words is None else words
+        unique = len(set(words))
+        lowered = text.lower()
+
+        total = len(doc)
+        pos = Counter(token.pos_ for token in doc)
+        sentences = list(doc.sents)
+        dependencies = Counter(token.dep_ for token in doc)
+
+        return {
+            "TTR": unique / len(words) if words else 0,
+            "Brunet_Index": len(words) ** (unique ** -0.165) if words else 0,
+            "Avg_Word_Length": np.mean([len(word) for word in words]) if words else 0,
+            "NOUN_ratio": pos.get("NOUN", 0) / total if total else 0,
+            "VERB_ratio": pos.get("VERB", 0) / total if total else 0,
+            "PRONOUN_ratio": pos.get("PRON", 0) / total if total else 0,
+            "Subordinate_Clauses": dependencies.get("mark", 0) / len(sentences) if sentences else 0,
+            "Parse_Tree_Depth": max(get_parse_depth(s) for s in sentences) if sentences else 0,
+            "Idea_Density": (unique / len(words)) * 100 if words else 0,
+            "Key_Elements_Described": sum(1 for e in self.key_elements if e in lowered),
+            "Irrelevant_Details": sum(1 for d in self.irrelevant_details if d in lowered),
+            "Pauses": filler_count if filler_count is not None else len(FILLER_PATTERN.findall(lowered)),
+            "Repair_Rate": dependencies.get("reparandum", 0) / len(sentences) if total else 0,
+        }
+
+    def extract(self, text, words=None, filler_count=None):
+        """Features of one transcript; see `from_doc`."""
+        return self.from_doc(text, self.nlp(text, disable=self.disable), words, filler_count)
+
+    def extract_many(self, texts, words=None, filler_counts=None, batch_size=64):
+        """
+        Features of many transcripts, parsed in batches with nlp.pipe.
+        `words` and `filler_counts` are optional per-text lists, as in
+        `from_doc` (None entries are computed from the text).
+        """
+        texts = list(texts)
+        words = words or [None] * len(texts)
+        filler_counts = filler_counts or [None] * len(texts)
+        docs = self.nlp.pipe(texts, disable=self.disable, batch_size=batch_size)
+        return [
+            self.from_doc(text, doc, text_words, filler_count)
+            for text, doc, text_words, filler_count in zip(texts, docs, words, filler_counts)
+        ]
+
+    def to_matrix(self, features):
+        """Rows of feature dicts as an array in FEATURE_COLUMNS order."""
+        return np.array([[row[name] for name in FEATURE_COLUMNS] for row in features], dtype=float)
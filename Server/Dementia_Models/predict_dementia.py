@@ -5,96 +5,64 @@ import joblib
 from sentence_transformers import SentenceTransformer
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import VotingClassifier
-from transformers import BertTokenizer, BertModel
+from transformers import BertTokenizer
 import spacy
-from collections import Counter
 import re
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
-import torch
 from scipy.stats import entropy
 from dotenv import load_dotenv
 load_dotenv()
 import os
 
+from Config.inferenceConfig import (
+    BERT_BATCH_MAX_SIZE,
+    BERT_BATCH_MAX_WAIT_MS,
+    DYNAMIC_BATCHING_ENABLED,
+    ENCODER_BACKEND,
+    ENCODER_ONNX_DIR,
+    ENCODER_ONNX_THREADS,
+    SPEECH_CACHE_DIR,
+    SPEECH_CACHE_DISK_MB,
+    SPEECH_CACHE_ENABLED,
+    SPEECH_CACHE_MEMORY_ITEMS,
+)
+from dynamic_batching import DynamicBatcher
+from tiered_cache import TieredCache
+from Dementia_Models.linguistic_features import LinguisticFeatureExtractor, count_fillers
+from Dementia_Models.speech_cache import SpeechCache, model_version
+from Dementia_Models.speech_encoder import BERT_MODEL_NAME, SpeechEncoder, load_backend
+
 # Load spaCy model
 nlp = spacy.load("en_core_web_sm")
+linguistic_features = LinguisticFeatureExtractor(nlp)
 
 
 # Load the trained models
 clinical_model = joblib.load("./Dementia_Models/Dataset1/best_model_clinical.joblib")
-speech_model = joblib.load("./Dementia_Models/Dataset2/best_model_speech.joblib")
+SPEECH_MODEL_PATH = "./Dementia_Models/Dataset2/best_model_speech.joblib"
+SPEECH_SCALER_PATH = "./Dementia_Models/Dataset2/speech_scaler.joblib"
+speech_model = joblib.load(SPEECH_MODEL_PATH)
 meta_classifier = joblib.load("./Dementia_Models/MetaClassifier/full_meta_classifier.joblib")
 preprocessor = joblib.load("./Dementia_Models/Dataset1/preprocessor.joblib")
-scaler = joblib.load("./Dementia_Models/Dataset2/speech_scaler.joblib")
-
-
-def calculate_ttr(text):
-    words = text.split()
-    return len(set(words)) / len(words) if words else 0
-
-
-def calculate_brunet(text):
-    words = text.split()
-    return len(words) ** (len(set(words)) ** -0.165) if words else 0
-
-
-def calculate_avg_word_length(text):
-    words = text.split()
-    return np.mean([len(word) for word in words]) if words else 0
-
-
-def calculate_pos_ratios(text):
-    doc = nlp(text)
-    total = len(doc)
-    counts = Counter([t.pos_ for t in doc])
-    return {
-        "NOUN_ratio": counts.get("NOUN", 0) / total if total else 0,
-        "VERB_ratio": counts.get("VERB", 0) / total if total else 0,
-        "PRONOUN_ratio": counts.get("PRON", 0) / total if total else 0,
-    }
-
-
-def get_parse_depth(sent):
-    depths = {token.i: 0 for token in sent}
-    for token in sent:
-        if token.head != token:
-            depths[token.i] = depths[token.head.i] + 1
-    return max(depths.values()) if depths else 0
-
-
-def calculate_sentence_complexity(text):
-    doc = nlp(text)
-    sentences = list(doc.sents)
-    if not sentences:
-        return {"subordinate_clauses": 0, "parse_tree_depth": 0}
-    clauses = sum(1 for t in doc if t.dep_ == "mark")
-    depth = max(get_parse_depth(s) for s in sentences)
-    return {"subordinate_clauses": clauses / len(sentences), "parse_tree_depth": depth}
-
-
-def calculate_idea_density(text):
-    words = text.split()
-    return (len(set(words)) / len(words)) * 100 if words else 0
-
+scaler = joblib.load(SPEECH_SCALER_PATH)
 
-def count_key_elements(text, elements):
-    text = text.lower()
-    return sum(1 for e in elements if e in text)
 
+def tokens_from_timing(timing, text):
+    """
+    Rebuild text.split() from a structured transcript without re-tokenizing.
 
-def count_irrelevant_details(text, details):
-    text = text.lower()
-    return sum(1 for d in details if d in text)
-
-
-def count_pauses(text):
-    return len(re.findall(r"\b(uh|um)\b", text.lower()))
-
-
-def calculate_repair_rate(text):
-    doc = nlp(text)
-    repairs = sum(1 for token in doc if token.dep_ == "reparandum")
-    return repairs / len(list(doc.sents)) if doc else 0
+    The words plus a "[pause Xs]" marker for every gap at or above the
+    threshold are exactly the tokens of the transcript string. If the
+    transcript was edited after transcription they no longer match, and
+    None is returned so the caller falls back to the text.
+    """
+    tokens = []
+    words, gaps = timing["words"], timing["gaps"]
+    for i, word in enumerate(words):
+        tokens.extend(word.split())
+        if i < len(gaps) and gaps[i] >= timing["pause_threshold"]:
+            tokens.extend(["[pause", f"{gaps[i]:.1f}s]"])
+    return tokens if " ".join(tokens) == " ".join(text.split()) else None
 
 
 # Clean text
@@ -104,136 +72,182 @@ def clean_text(text):
     return text.strip()
 
 # Load BERT
-tokenizer = BertTokenizer.from_pretrained("bert-base-uncased")
-bert_model = BertModel.from_pretrained("bert-base-uncased")
-
-
-# Function to extract BERT embeddings in batches
-def extract_bert_embeddings(texts, batch_size=16):
-    embeddings = []
-    for i in range(0, len(texts), batch_size):
-        batch_texts = list(texts[i : i + batch_size])
-        inputs = tokenizer(
-            batch_texts,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=256,
-        )
-        with torch.no_grad():
-            outputs = bert_model(**inputs)
-        batch_embeddings = outputs.last_hidden_state.mean(dim=1).numpy()
-        embeddings.append(batch_embeddings)
-    return np.vstack(embeddings)
+tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
+encoder_backend = load_backend(ENCODER_BACKEND, ENCODER_ONNX_DIR, ENCODER_ONNX_THREADS)
+# The PyTorch model, when that is the backend in use (serve.py freezes it)
+bert_model = getattr(encoder_backend, "model", None)
+speech_encoder = SpeechEncoder(tokenizer, encoder_backend, max_length=256, max_batch_size=BERT_BATCH_MAX_SIZE)
+print(f"Dementia BERT encoder backend: {encoder_backend.name}")
 
+speech_cache = SpeechCache(
+    TieredCache(SPEECH_CACHE_MEMORY_ITEMS, SPEECH_CACHE_DIR, SPEECH_CACHE_DISK_MB * 1024 * 1024)
+    if SPEECH_CACHE_ENABLED
+    else None,
+    model_version([SPEECH_MODEL_PATH, SPEECH_SCALER_PATH], encoder_backend, nlp),
+)
 
 
+def _embed_requests(payloads):
+    # One batch of the shared BERT batcher: every request's texts, in order
+    texts = [text for payload in payloads for text in payload]
+    embeddings = speech_encoder.encode(texts)
+    return np.split(embeddings, np.cumsum([len(payload) for payload in payloads])[:-1])
 
-def predict_from_input(manual_input, transcript_ctd, transcript_pft, transcript_sft):
 
-    manual_df = pd.DataFrame([manual_input])
-    manual_df_processed = preprocessor.transform(manual_df)
-    clinical_pred = clinical_model.predict(manual_df_processed)[0]
-    clinical_proba = clinical_model.predict_proba(manual_df_processed)[0]
-
-    df = pd.DataFrame({
-        "combined_text": [transcript_ctd],
-        "Transcript_CTD": [transcript_ctd],
-        "Transcript_PFT": [transcript_pft],
-        "Transcript_SFT": [transcript_sft],
-    })
-
-    
-   # Apply features to full dataset
-    df["TTR"] = df["combined_text"].apply(calculate_ttr)
-    df["Brunet_Index"] = df["combined_text"].apply(calculate_brunet)
-    df["Avg_Word_Length"] = df["combined_text"].apply(calculate_avg_word_length)
-
-    pos_ratios = df["combined_text"].apply(calculate_pos_ratios)
-    df["NOUN_ratio"] = pos_ratios.apply(lambda x: x["NOUN_ratio"])
-    df["VERB_ratio"] = pos_ratios.apply(lambda x: x["VERB_ratio"])
-    df["PRONOUN_ratio"] = pos_ratios.apply(lambda x: x["PRONOUN_ratio"])
-
-    complexity = df["combined_text"].apply(calculate_sentence_complexity)
-    df["Subordinate_Clauses"] = complexity.apply(
-      lambda x: x["subordinate_clauses"] if x else 0
-   )
-    df["Parse_Tree_Depth"] = complexity.apply(lambda x: x["parse_tree_depth"] if x else 0)
-
-    df["Idea_Density"] = df["combined_text"].apply(calculate_idea_density)
-
-    key_elements = [
-      "boy stealing cookies",
-      "sink overflowing",
-      "mother",
-      "kitchen",
-      "cookies",
-   ]
-    irrelevant_details = ["dog", "cat", "car", "tree"]
-
-    df["Key_Elements_Described"] = df["combined_text"].apply(
-      lambda x: count_key_elements(x, key_elements)
-   )
-    df["Irrelevant_Details"] = df["combined_text"].apply(
-      lambda x: count_irrelevant_details(x, irrelevant_details)
-   )
-    df["Pauses"] = df["combined_text"].apply(count_pauses)
-    df["Repair_Rate"] = df["combined_text"].apply(calculate_repair_rate)
-
-    df.drop(columns=["combined_text"], inplace=True)
-
-    df["Transcript_CTD"] = df["Transcript_CTD"].fillna("").apply(clean_text)
-    df["Transcript_PFT"] = df["Transcript_PFT"].fillna("").apply(clean_text)
-    df["Transcript_SFT"] = df["Transcript_SFT"].fillna("").apply(clean_text)
-    df["Text"] = (
-        df["Transcript_CTD"] + " " + df["Transcript_PFT"] + " " + df["Transcript_SFT"]
-    )
-
-    feature_columns = [
-        "TTR", "Brunet_Index", "Avg_Word_Length", "NOUN_ratio", "VERB_ratio", "PRONOUN_ratio",
-        "Subordinate_Clauses", "Parse_Tree_Depth", "Idea_Density", "Key_Elements_Described",
-        "Irrelevant_Details", "Pauses", "Repair_Rate",
-    ]
-    test_features = df.loc[df.index, feature_columns].values
-    test_features_scaled = scaler.transform(test_features)
+bert_batcher = DynamicBatcher("bert", _embed_requests, BERT_BATCH_MAX_SIZE, BERT_BATCH_MAX_WAIT_MS)
 
-    ct_emb_test = extract_bert_embeddings(df.loc[df.index, "Transcript_CTD"])
-    pf_emb_test = extract_bert_embeddings(df.loc[df.index, "Transcript_PFT"])
-    sf_emb_test = extract_bert_embeddings(df.loc[df.index, "Transcript_SFT"])
-    test_combined = np.hstack((ct_emb_test, pf_emb_test, sf_emb_test, test_features_scaled))
 
-    speech_pred = speech_model.predict(test_combined)[0]
-    speech_proba = speech_model.predict_proba(test_combined)[0]
-
-    combined_probs = np.hstack((clinical_proba, speech_proba))
-    clinical_max_prob = np.max(clinical_proba)
-    speech_max_prob = np.max(speech_proba)
+# Function to extract BERT embeddings in batches
+def extract_bert_embeddings(texts, batch_size=16):
+    texts = list(texts)
+    if not DYNAMIC_BATCHING_ENABLED or len(texts) <= BERT_BATCH_MAX_SIZE:
+        if DYNAMIC_BATCHING_ENABLED:
+            # Shares forward passes with concurrent requests
+            return bert_batcher.submit(texts)
+        return speech_encoder.encode(texts, batch_size)
+
+    # A batch prediction goes to the shared batcher one full batch at a
+    # time, so requests arriving meanwhile are queued between its slices
+    # rather than behind all of it. Ordering by length first keeps each
+    # slice padded to similar lengths.
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    embeddings = np.zeros((len(texts), speech_encoder.dim), dtype=np.float32)
+    for start in range(0, len(order), BERT_BATCH_MAX_SIZE):
+        rows = order[start : start + BERT_BATCH_MAX_SIZE]
+        embeddings[rows] = bert_batcher.submit([texts[i] for i in rows])
+    return embeddings
+
+
+def speech_branch(transcripts, progress=None):
+    """
+    speech_model's predictions for the transcripts of many assessments.
+
+    Every stage is looked up in speech_cache before it is computed: the
+    prediction itself, then the linguistic features and the embedding of
+    each transcript, so only what changed since an earlier submission is
+    recomputed. What is left runs batched across the assessments: one
+    nlp.pipe pass, one BERT call over every distinct transcript (in
+    length-sorted buckets) and one speech_model call.
+    Args:
+        transcripts (list[tuple]): (transcript_ctd, transcript_pft,
+            transcript_sft, timing_ctd) per assessment.
+    Returns:
+        tuple: (speech_pred, speech_proba) arrays, one row per assessment.
+    """
+    # A structured transcript already carries its tokens. The filler count
+    # is taken from those verified tokens, never from the client's stats
+    tokens = [tokens_from_timing(timing, ctd) if timing else None for ctd, _, _, timing in transcripts]
+    filler_counts = [count_fillers(words) if words is not None else None for words in tokens]
+    texts = [[clean_text("" if text is None else text) for text in item[:3]] for item in transcripts]
+
+    features_keys = [speech_cache.features_key(item[0], count) for item, count in zip(transcripts, filler_counts)]
+    embedding_keys = [[speech_cache.embedding_key(text) for text in row] for row in texts]
+    proba_keys = [speech_cache.proba_key(f, e) for f, e in zip(features_keys, embedding_keys)]
+    results = [speech_cache.get(key) for key in proba_keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if pending:
+        features = [speech_cache.get(features_keys[i]) for i in pending]
+        unparsed = [j for j, row in enumerate(features) if row is None]
+        if unparsed:
+            # One parse of each transcript for every linguistic feature
+            extracted = linguistic_features.extract_many(
+                [transcripts[pending[j]][0] for j in unparsed],
+                words=[tokens[pending[j]] for j in unparsed],
+                filler_counts=[filler_counts[pending[j]] for j in unparsed],
+            )
+            for j, row in zip(unparsed, extracted):
+                features[j] = row
+                speech_cache.set(features_keys[pending[j]], row)
+        test_features_scaled = scaler.transform(linguistic_features.to_matrix(features))
+
+        if progress is not None:
+            progress("infer")
+        wanted = {key: text for i in pending for key, text in zip(embedding_keys[i], texts[i])}
+        embeddings = {key: speech_cache.get(key) for key in wanted}
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        if missing:
+            # The transcripts not seen before share forward passes
+            for key, embedding in zip(missing, extract_bert_embeddings([wanted[key] for key in missing])):
+                embeddings[key] = embedding
+                speech_cache.set(key, embedding)
+        # Each 3 x 768 block flattens to the CTD, PFT and SFT embedding columns
+        transcript_emb = np.stack([np.concatenate([embeddings[key] for key in embedding_keys[i]]) for i in pending])
+        test_combined = np.hstack((transcript_emb, test_features_scaled))
+
+        speech_pred = speech_model.predict(test_combined)
+        speech_proba = speech_model.predict_proba(test_combined)
+        for i, pred, proba in zip(pending, speech_pred, speech_proba):
+            results[i] = (pred, proba)
+            speech_cache.set(proba_keys[i], results[i])
+    elif progress is not None:
+        # Every prediction was cached, but the stage is still reported
+        progress("infer")
+
+    return np.array([pred for pred, _ in results]), np.vstack([proba for _, proba in results])
+
+
+def meta_features(clinical_proba, speech_proba):
+    """The meta classifier's inputs, one row per pair of probability rows."""
+    clinical_max_prob = np.max(clinical_proba, axis=1)
+    speech_max_prob = np.max(speech_proba, axis=1)
     confidence_diff = np.abs(clinical_max_prob - speech_max_prob)
     confidence_ratio = clinical_max_prob / (speech_max_prob + 1e-10)
-    clinical_pred_idx = np.argmax(clinical_proba)
-    speech_pred_idx = np.argmax(speech_proba)
-    agreement = int(clinical_pred_idx == speech_pred_idx)
+    clinical_pred_idx = np.argmax(clinical_proba, axis=1)
+    speech_pred_idx = np.argmax(speech_proba, axis=1)
+    agreement = (clinical_pred_idx == speech_pred_idx).astype(int)
 
-    clinical_entropy = entropy(clinical_proba + 1e-10)
-    speech_entropy = entropy(speech_proba + 1e-10)
+    clinical_entropy = entropy(clinical_proba + 1e-10, axis=1)
+    speech_entropy = entropy(speech_proba + 1e-10, axis=1)
     clinical_weight = 0.5 + clinical_max_prob
     speech_weight = 0.5 + speech_max_prob
 
-    meta_features = np.hstack([
-        combined_probs,
-        [clinical_max_prob, speech_max_prob, confidence_diff, confidence_ratio,
-         clinical_entropy, speech_entropy, agreement, clinical_weight, speech_weight]
+    return np.column_stack([
+        clinical_proba, speech_proba,
+        clinical_max_prob, speech_max_prob, confidence_diff, confidence_ratio,
+        clinical_entropy, speech_entropy, agreement, clinical_weight, speech_weight,
     ])
 
-    result = meta_classifier.predict(meta_features.reshape(1, -1))
-    proba = meta_classifier.predict_proba(meta_features.reshape(1, -1))
 
-    return {
-        "clinical_pred": int(clinical_pred),
-        "clinical_proba": clinical_proba[clinical_pred],
-        "speech_pred": int(speech_pred),
-        "speech_proba": speech_proba[speech_pred],
-        "meta_pred": int(result[0]),
-        "meta_proba": proba[0][result[0]],
-    }
+def predict_many(manual_inputs, transcripts, progress=None):
+    """
+    Dementia predictions for many assessments, each model called once on
+    the whole batch.
+    Args:
+        manual_inputs (list[dict]): Clinical fields per assessment.
+        transcripts (list[tuple]): (transcript_ctd, transcript_pft,
+            transcript_sft, timing_ctd) per assessment.
+    Returns:
+        list[dict]: predict_from_input's result for each assessment, in order.
+    """
+    if progress is not None:
+        progress("preprocess")
+
+    manual_df = pd.DataFrame(manual_inputs)
+    manual_df_processed = preprocessor.transform(manual_df)
+    clinical_pred = clinical_model.predict(manual_df_processed)
+    clinical_proba = clinical_model.predict_proba(manual_df_processed)
+
+    speech_pred, speech_proba = speech_branch(transcripts, progress=progress)
+
+    meta = meta_features(clinical_proba, speech_proba)
+    result = meta_classifier.predict(meta)
+    proba = meta_classifier.predict_proba(meta)
+
+    return [
+        {
+            "clinical_pred": int(clinical_pred[i]),
+            "clinical_proba": clinical_proba[i][clinical_pred[i]],
+            "speech_pred": int(speech_pred[i]),
+            "speech_proba": speech_proba[i][speech_pred[i]],
+            "meta_pred": int(result[i]),
+            "meta_proba": proba[i][result[i]],
+        }
+        for i in range(len(manual_inputs))
+    ]
+
 
+def predict_from_input(manual_input, transcript_ctd, transcript_pft, transcript_sft, timing_ctd=None, progress=None):
+    return predict_many(
+        [manual_input], [(transcript_ctd, transcript_pft, transcript_sft, timing_ctd)], progress=progress
+    )[0]
@@ -0,0 +1,74 @@
+import hashlib
+import os
+
+from single_flight import content_hash
+
+# Bumped whenever the feature or pooling code changes what is computed
+# from the same transcript, so old entries stop matching
+CACHE_FORMAT = "speech-v1"
+
+
+def model_version(model_files, backend, nlp):
+    """
+    Fingerprint of everything the cached values depend on besides the text.
+
+    The joblib models are small enough to hash at startup. An exported
+    ONNX encoder is not, so its size and modification time stand in for
+    its contents. The spaCy pipeline is identified by its package name
+    and version, since upgrading it changes the parse-based features.
+    """
+    parts = [CACHE_FORMAT, backend.name, nlp.meta["lang"] + "_" + nlp.meta["name"], nlp.meta["version"]]
+    for path in model_files:
+        with open(path, "rb") as f:
+            parts.append(hashlib.sha256(f.read()).hexdigest())
+    path = getattr(backend, "path", None)
+    if path:
+        stat = os.stat(path)
+        parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+    return content_hash(*parts)[:16]
+
+
+class SpeechCache:
+    """
+    Memo of the speech branch of the dementia prediction, on a TieredCache.
+
+    Three kinds of entry, each keyed by a hash of its inputs plus the
+    model version:
+
+    - features: the linguistic features of the CTD transcript. They depend
+      on its exact text (case and spacing included); the filler count in
+      the key is the one counted from that text's verified tokens.
+    - embedding: the BERT embedding of one transcript, keyed by its
+      cleaned text (clean_text), which is all the encoder sees.
+    - proba: speech_model's prediction and probabilities for a features
+      entry plus three embeddings.
+
+    A resubmission with unchanged transcripts is a single proba lookup;
+    editing one transcript re-embeds only that one. With `cache` None
+    (caching disabled) every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, cache, version):
+        self.cache = cache
+        self.version = version
+
+    def features_key(self, text, filler_count=None):
+        return content_hash("features", self.version, text, str(filler_count))
+
+    def embedding_key(self, cleaned_text):
+        return content_hash("embedding", self.version, cleaned_text)
+
+    def proba_key(self, features_key, embedding_keys):
+        return content_hash("proba", self.version, features_key, *embedding_keys)
+
+    def get(self, key):
+        return self.cache.get(key) if self.cache is not None else None
+
+    def set(self, key, value):
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    def stats(self):
+        if self.cache is None:
+            return None
+        return {"version": self.version, **self.cache.stats()}
@@ -0,0 +1,168 @@
+import os
+import threading
+
+import numpy as np
+import torch
+
+# Transcripts the speech model embeds, in the order of its feature columns
+TRANSCRIPTS = ("Transcript_CTD", "Transcript_PFT", "Transcript_SFT")
+
+BERT_MODEL_NAME = "bert-base-uncased"
+
+# Files written by Dementia_Models.export_encoder, per ONNX backend
+ONNX_FILES = {"onnx": "bert_fp32.onnx", "onnx-int8": "bert_int8.onnx"}
+BACKENDS = ("torch",) + tuple(ONNX_FILES)
+
+
+class TorchBackend:
+    """bert-base-uncased in fp32 PyTorch."""
+
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+        self.dim = model.config.hidden_size
+
+    def warm(self):
+        pass
+
+    def __call__(self, inputs):
+        with torch.inference_mode():
+            outputs = self.model(**{key: torch.from_numpy(value) for key, value in inputs.items()})
+        return outputs.last_hidden_state.numpy()
+
+
+class OnnxBackend:
+    """
+    An exported BERT encoder run with ONNX Runtime on the CPU.
+
+    The session is created on first use in each process rather than at
+    import: ONNX Runtime starts its thread pool with the session, and
+    threads do not survive the fork in serve.py.
+    """
+
+    def __init__(self, name, path, threads=0, dim=768):
+        self.name = name
+        self.path = path
+        self.threads = threads
+        self.dim = dim
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                import onnxruntime
+
+                options = onnxruntime.SessionOptions()
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if self.threads:
+                    options.intra_op_num_threads = self.threads
+                self._session = onnxruntime.InferenceSession(
+                    self.path, options, providers=["CPUExecutionProvider"]
+                )
+                self._input_names = [node.name for node in self._session.get_inputs()]
+                self._pid = os.getpid()
+                print(f"Loaded the {self.name} encoder from {self.path}")
+            return self._session
+
+    def warm(self):
+        self._get_session()
+
+    def __call__(self, inputs):
+        session = self._get_session()
+        feed = {name: inputs[name].astype(np.int64) for name in self._input_names}
+        return session.run(["last_hidden_state"], feed)[0]
+
+
+def load_backend(name, onnx_dir=None, threads=0):
+    """
+    Args:
+        name (str): One of BACKENDS.
+        onnx_dir (str): Directory of the exported ONNX models.
+        threads (int): ONNX Runtime intra-op threads (0 for its default).
+    Returns:
+        TorchBackend | OnnxBackend
+    Raises:
+        ValueError: If the backend is unknown.
+        FileNotFoundError: If its ONNX model has not been exported.
+    """
+    if name == "torch":
+        from transformers import BertModel
+
+        return TorchBackend(BertModel.from_pretrained(BERT_MODEL_NAME))
+    if name not in ONNX_FILES:
+        raise ValueError(f"Unknown encoder backend {name!r}; expected one of {', '.join(BACKENDS)}")
+
+    path = os.path.join(onnx_dir, ONNX_FILES[name])
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; export it with `python -m Dementia_Models.export_encoder`")
+    return OnnxBackend(name, path, threads)
+
+
+class SpeechEncoder:
+    """
+    Mean-pooled BERT embeddings of the transcripts for the speech model.
+
+    Texts are tokenized once without padding, sorted by token length and
+    cut into buckets of at most `max_batch_size` neighbours, so each
+    bucket is only padded to its own longest text. Every bucket is one
+    forward pass of the backend, and pooling averages the real tokens only
+    (padding is masked out), so a text's embedding does not depend on what
+    it was batched with and matches the embedding of the text run on its
+    own.
+    """
+
+    def __init__(self, tokenizer, backend, max_length=256, max_batch_size=16):
+        self.tokenizer = tokenizer
+        self.backend = backend
+        self.max_length = max_length
+        self.max_batch_size = max_batch_size
+
+    @property
+    def dim(self):
+        return self.backend.dim
+
+    def warm(self):
+        self.backend.warm()
+
+    def _forward(self, features):
+        inputs = dict(self.tokenizer.pad(features, return_tensors="np"))
+        hidden = self.backend(inputs)
+        mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+
+    def buckets(self, lengths, max_batch_size=None):
+        """Indices of the texts, grouped into length-sorted forward passes."""
+        size = max_batch_size or self.max_batch_size
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        return [order[i : i + size] for i in range(0, len(order), size)]
+
+    def encode(self, texts, max_batch_size=None):
+        """
+        Args:
+            texts (list[str]): Texts to embed.
+            max_batch_size (int): Rows per forward pass (default: the
+                encoder's).
+        Returns:
+            np.ndarray: One row per text, in the order given.
+        """
+        texts = [str(text) for text in texts]
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        for bucket in self.buckets(lengths, max_batch_size):
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in bucket]
+            embeddings[bucket] = self._forward(features)
+        return embeddings
+
+    def encode_transcripts(self, transcript_ctd, transcript_pft, transcript_sft):
+        """
+        The 3 x hidden_size block of one assessment, in TRANSCRIPTS order;
+        `.reshape(1, -1)` gives the embedding columns of the speech model.
+        """
+        return self.encode([transcript_ctd, transcript_pft, transcript_sft])
@@ -1,4 +1,6 @@
 import torch
+from Config.inferenceConfig import CBRAMOD_BATCH_MAX_SIZE, CBRAMOD_BATCH_MAX_WAIT_MS, DYNAMIC_BATCHING_ENABLED
+from dynamic_batching import DynamicBatcher
 from Depression_module.models_cbramod import CBraModMumtaz, Params
 from Depression_module.preprocessing import preprocess_edf
 from Depression_module.severity import predict_severity
@@ -7,11 +9,33 @@ param = Params()
 model = CBraModMumtaz(param).to(param.device)
 model.eval()
 
-def predict_depression(file_path, threshold=0.815):
-    segments = preprocess_edf(file_path)
+
+def _score_requests(payloads):
+    # One batch of the shared CBraMod batcher: every request's EEG segments
+    # in one tensor, forwarded in chunks of at most CBRAMOD_BATCH_MAX_SIZE
+    segments = torch.cat(payloads)
     with torch.no_grad():
-        outputs = model(segments)
-        probs = torch.sigmoid(outputs)
+        outputs = torch.cat([
+            model(segments[i:i + CBRAMOD_BATCH_MAX_SIZE]).reshape(-1)
+            for i in range(0, len(segments), CBRAMOD_BATCH_MAX_SIZE)
+        ])
+    return list(torch.split(outputs, [len(payload) for payload in payloads]))
+
+
+cbramod_batcher = DynamicBatcher("cbramod", _score_requests, CBRAMOD_BATCH_MAX_SIZE, CBRAMOD_BATCH_MAX_WAIT_MS)
+
+def predict_depression(file_path, threshold=0.815, progress=None):
+    if progress is not None:
+        progress("preprocess")
+    segments = preprocess_edf(file_path)
+    if progress is not None:
+        progress("infer")
+    if DYNAMIC_BATCHING_ENABLED:
+        outputs = cbramod_batcher.submit(segments)
+    else:
+        with torch.no_grad():
+            outputs = model(segments)
+    probs = torch.sigmoid(outputs)
     mean_prob = probs.mean().item()
     pred_label = 1 if mean_prob >= threshold else 0
     return pred_label, mean_prob
@@ -0,0 +1,51 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+from faster_whisper import decode_audio
+
+SAMPLE_RATE = 16000
+
+
+def decode_to_pcm(data, sampling_rate=SAMPLE_RATE):
+    """
+    Decode an encoded audio upload (webm/ogg/wav/...) without temp files.
+    Args:
+        data (bytes | str): Raw bytes of the uploaded file, or the path of a
+            spooled upload (see uploads.py).
+        sampling_rate (int): Target sample rate.
+    Returns:
+        np.ndarray: Mono float32 PCM in [-1, 1] at `sampling_rate`.
+    Raises:
+        ValueError: If the bytes cannot be decoded as audio.
+    """
+    try:
+        source = data if isinstance(data, str) else io.BytesIO(data)
+        return decode_audio(source, sampling_rate=sampling_rate)
+    except Exception as e:
+        raise ValueError(f"Could not decode audio: {e}") from e
+
+
+async def decode_upload(data, sampling_rate=SAMPLE_RATE):
+    """Decode upload bytes (or a spooled upload's path) in a worker thread so the event loop stays free."""
+    return await asyncio.to_thread(decode_to_pcm, data, sampling_rate)
+
+
+def pcm_to_wav_bytes(audio, sampling_rate=SAMPLE_RATE):
+    """
+    Wrap float32 PCM in a 16-bit mono WAV container held in memory.
+    Args:
+        audio (np.ndarray): Mono float32 PCM in [-1, 1].
+        sampling_rate (int): Sample rate of `audio`.
+    Returns:
+        bytes: A complete RIFF/WAV file body.
+    """
+    pcm16 = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sampling_rate)
+        wav.writeframes(pcm16.tobytes())
+    return buffer.getvalue()
@@ -0,0 +1,227 @@
+"""
+Benchmark faster-whisper settings on this machine and save the best one.
+
+Run from the Server directory:
+
+    python -m Transcribe.autotune --fixtures ./path/to/recordings
+
+Every combination of model size, compute type, cpu_threads, num_workers
+and beam size is run in a fresh process over synthetic audio plus any
+fixture recordings. For each one the real-time factor (decode time /
+audio time), peak RSS and word agreement with a reference transcript
+are reported. The fastest configuration that stays within the agreement
+and memory limits is written to Config/whisper_tuned.json, which
+Config/transcribeConfig.py reads at startup.
+
+Model size, compute type and beam size change what is transcribed, so
+they are only tuned when --fixtures gives real recordings to measure
+agreement on. Without fixtures only cpu_threads and num_workers are
+benchmarked, on the model, compute type and beam size already
+configured, and only those two keys are updated in the output file.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from Config.transcribeConfig import (
+    WHISPER_BEAM_SIZE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_MODEL_SIZE,
+    WHISPER_TUNED_CONFIG,
+)
+from Transcribe.audio_decode import SAMPLE_RATE
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".mp3", ".m4a", ".ogg", ".flac")
+# Fixed rather than taken from the tuned config, so the reference cannot
+# drift down with each run
+REFERENCE = "medium:int8"
+# Knobs that only change speed, not the transcript
+SPEED_KEYS = ("cpu_threads", "num_workers")
+
+
+def synthetic_audio(seconds=30, seed=0):
+    """
+    Speech-like test signal: voiced bursts (a pitched harmonic stack with
+    formant-ish weighting) separated by silences of varying length. It has
+    no words, so it only contributes to timing and memory figures.
+    """
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    cursor = 0
+    while cursor < len(audio):
+        burst = int(rng.uniform(0.2, 1.2) * SAMPLE_RATE)
+        t = np.arange(burst) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 12))
+        envelope = np.sin(np.pi * t / t[-1]) ** 2
+        segment = (0.1 * voiced * envelope).astype(np.float32)
+        audio[cursor:cursor + burst] = segment[:len(audio) - cursor]
+        cursor += burst + int(rng.uniform(0.1, 1.5) * SAMPLE_RATE)
+    return audio
+
+
+def load_fixtures(directory):
+    from faster_whisper import decode_audio
+
+    clips = {}
+    if directory:
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                clips[name] = decode_audio(os.path.join(directory, name), sampling_rate=SAMPLE_RATE)
+    return clips
+
+
+def word_agreement(reference, hypothesis):
+    """1 - word error rate of `hypothesis` against `reference`, floored at 0."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 1.0 if not hyp else 0.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return max(0.0, 1 - previous[-1] / len(ref))
+
+
+def _run_config(config, clips):
+    # Runs in a fresh process, so ru_maxrss is this configuration's own peak
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        config["model_size"],
+        compute_type=config["compute_type"],
+        cpu_threads=config["cpu_threads"],
+        num_workers=config["num_workers"],
+    )
+
+    def transcribe(audio):
+        segments, _ = model.transcribe(audio, beam_size=config["beam_size"], word_timestamps=True)
+        return " ".join(segment.text.strip() for segment in segments)
+
+    # num_workers only pays off with concurrent callers, so feed the model
+    # from that many threads, as the pool does under load
+    names = list(clips)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config["num_workers"]) as executor:
+        texts = list(executor.map(transcribe, [clips[name] for name in names]))
+    elapsed = time.perf_counter() - started
+
+    audio_seconds = sum(len(audio) for audio in clips.values()) / SAMPLE_RATE
+    return {
+        "rtf": elapsed / audio_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "transcripts": dict(zip(names, texts)),
+    }
+
+
+def run_isolated(config, clips):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(_run_config, (config, clips))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Directory of real recordings to include")
+    parser.add_argument("--synthetic-seconds", type=float, default=30)
+    parser.add_argument("--sizes", default="base,small,medium")
+    parser.add_argument("--compute-types", default="int8,int8_float32")
+    parser.add_argument("--cpu-threads", default=f"0,{os.cpu_count() or 1}")
+    parser.add_argument("--num-workers", default="1,2")
+    parser.add_argument("--beam-sizes", default="1,5")
+    parser.add_argument("--reference", default=REFERENCE,
+                        help="size:compute_type whose beam-5 output is the agreement reference")
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--output", default=WHISPER_TUNED_CONFIG)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    split = lambda value, cast=str: [cast(v) for v in value.split(",") if v]
+
+    clips = {"synthetic": synthetic_audio(args.synthetic_seconds)}
+    fixtures = load_fixtures(args.fixtures)
+    clips.update(fixtures)
+    print(f"Benchmarking on {len(clips)} clips ({len(fixtures)} fixtures)")
+
+    ref_size, ref_compute = args.reference.split(":")
+    reference = run_isolated(
+        {"model_size": ref_size, "compute_type": ref_compute, "cpu_threads": 0, "num_workers": 1, "beam_size": 5},
+        fixtures,
+    )["transcripts"] if fixtures else {}
+
+    if fixtures:
+        sizes, compute_types, beam_sizes = split(args.sizes), split(args.compute_types), split(args.beam_sizes, int)
+    else:
+        print(f"No fixtures: tuning only {', '.join(SPEED_KEYS)} for {WHISPER_MODEL_SIZE} "
+              f"{WHISPER_COMPUTE_TYPE} beam={WHISPER_BEAM_SIZE}")
+        sizes, compute_types, beam_sizes = [WHISPER_MODEL_SIZE], [WHISPER_COMPUTE_TYPE], [WHISPER_BEAM_SIZE]
+
+    results = []
+    grid = itertools.product(
+        sizes, compute_types, split(args.cpu_threads, int), split(args.num_workers, int), beam_sizes,
+    )
+    for size, compute_type, cpu_threads, num_workers, beam_size in grid:
+        config = {
+            "model_size": size,
+            "compute_type": compute_type,
+            "cpu_threads": cpu_threads,
+            "num_workers": num_workers,
+            "beam_size": beam_size,
+        }
+        try:
+            measured = run_isolated(config, clips)
+        except Exception as e:
+            print(f"Skipping {config}: {e}")
+            continue
+
+        # Agreement is only meaningful on real speech
+        agreement = (
+            float(np.mean([word_agreement(reference[name], measured["transcripts"][name]) for name in fixtures]))
+            if fixtures else None
+        )
+        result = {**config, "rtf": measured["rtf"], "peak_rss_mb": measured["peak_rss_mb"], "agreement": agreement}
+        results.append(result)
+        print(f"{size:>8} {compute_type:>14} threads={cpu_threads:<3} workers={num_workers} beam={beam_size}"
+              f"  RTF={result['rtf']:.3f}  RSS={result['peak_rss_mb']:.0f}MB"
+              f"  agreement={'n/a' if agreement is None else f'{agreement:.3f}'}")
+
+    eligible = [
+        r for r in results
+        if (not fixtures or r["agreement"] >= args.min_agreement)
+        and (args.max_rss_mb is None or r["peak_rss_mb"] <= args.max_rss_mb)
+    ]
+    if not eligible:
+        print("No configuration met the agreement/memory limits; nothing written.")
+        return
+
+    best = min(eligible, key=lambda r: r["rtf"])
+    if fixtures:
+        tuned = best
+    else:
+        # Keep whatever an earlier run with fixtures chose for the rest
+        tuned = {}
+        if os.path.exists(args.output):
+            with open(args.output) as f:
+                tuned = json.load(f)
+        tuned.update({key: best[key] for key in SPEED_KEYS})
+    tuned.update({"cpu_count": os.cpu_count(), "measured_at": datetime.now().isoformat(timespec="seconds")})
+    with open(args.output, "w") as f:
+        json.dump(tuned, f, indent=2)
+    print(f"Best configuration written to {args.output}: {tuned}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from Config.transcribeConfig import (
+    AZURE_BREAKER_COOLDOWN,
+    AZURE_BREAKER_FAILURES,
+    AZURE_CONNECT_TIMEOUT,
+    AZURE_MAX_CONNECTIONS,
+    AZURE_READ_TIMEOUT,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Azure while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the breaker opens and every
+    call is rejected for `cooldown` seconds. The first call after the
+    cool-down is let through as a probe: success closes the breaker, failure
+    re-opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold, cooldown, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """Return True if a call may go ahead right now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cooldown or self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_abandoned(self):
+        """The call was cancelled before Azure answered; it proves nothing either way."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+
+class AzureSpeechClient:
+    """
+    Async client for the Azure Speech short-audio REST endpoint.
+
+    A single httpx.AsyncClient is reused so TLS connections stay alive
+    between requests. `endpoint` and `transport` can point the client at a
+    local stand-in server (or an httpx.MockTransport) for testing.
+    """
+
+    def __init__(
+        self,
+        endpoint,
+        speech_key,
+        language="en-US",
+        connect_timeout=AZURE_CONNECT_TIMEOUT,
+        read_timeout=AZURE_READ_TIMEOUT,
+        max_connections=AZURE_MAX_CONNECTIONS,
+        breaker=None,
+        transport=None,
+    ):
+        self.endpoint = endpoint
+        self.speech_key = speech_key
+        self.language = language
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.breaker = breaker or CircuitBreaker(AZURE_BREAKER_FAILURES, AZURE_BREAKER_COOLDOWN)
+        self._transport = transport
+        self._client = None
+
+    def _http(self):
+        # Created on first use so it binds to the server's running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def transcribe(self, wav_bytes):
+        """
+        Send a WAV body to Azure and return its transcript.
+        Args:
+            wav_bytes (bytes): In-memory WAV body.
+        Returns:
+            dict: Transcription result containing the text.
+        Raises:
+            CircuitOpenError: If Azure is being skipped after repeated failures.
+            Exception: If the request fails or no transcript is returned.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Azure Speech circuit is open; skipping Azure")
+
+        headers = {
+            "Ocp-Apim-Subscription-Key": self.speech_key,
+            "Content-Type": "audio/wav",
+            "Accept": "application/json",
+        }
+        params = {"language": self.language}
+
+        try:
+            response = await self._http().post(
+                self.endpoint, headers=headers, params=params, content=wav_bytes
+            )
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise Exception(f"Azure Speech API request failed: {e!r}") from e
+        except asyncio.CancelledError:
+            self.breaker.record_abandoned()
+            raise
+
+        if response.status_code != 200:
+            self.breaker.record_failure()
+            raise Exception(f"Azure Speech API error: {response.status_code} - {response.text}")
+
+        # The service answered, so it is healthy even if it heard nothing
+        self.breaker.record_success()
+
+        data = response.json()
+        if "DisplayText" not in data:
+            raise Exception("Azure Speech API did not return a valid transcript")
+        return {"transcript": data["DisplayText"]}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
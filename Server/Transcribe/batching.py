@@ -0,0 +1,227 @@
+import asyncio
+import bisect
+import time
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline
+from faster_whisper.vad import merge_segments
+
+from Config.transcribeConfig import (
+    VAD_TRIM_ENABLED,
+    WHISPER_BATCH_MAX_REQUESTS,
+    WHISPER_BATCH_SIZE,
+    WHISPER_BATCH_WINDOW_MS,
+    WHISPER_BEAM_SIZE,
+    WHISPER_LANGUAGE,
+)
+from Transcribe.audio_decode import SAMPLE_RATE
+from Transcribe.vad import speech_regions, trim_silence, vad_options
+from Transcribe.words import TimedWord, segment_confidence
+
+# Longest clip Whisper sees in one window
+CHUNK_LENGTH_S = 30
+
+# Unused silence laid between requests on the shared timeline. Segment
+# times come back rounded to the millisecond, so a clip starting exactly
+# at a request boundary could otherwise be read as the previous request's
+REQUEST_GAP_S = 1.0
+
+
+def _speech_clips(audio):
+    # Same clip layout BatchedInferencePipeline builds for itself: VAD
+    # regions merged into clips of at most one Whisper window
+    options = vad_options(max_speech_duration_s=CHUNK_LENGTH_S)
+    return merge_segments(speech_regions(audio, options), options)
+
+
+def _pack_clips(regions):
+    # Trimmed regions are contiguous, so packing them greedily into clips of
+    # at most one Whisper window gives the fewest clips
+    clips = []
+    for region in regions:
+        if clips and region["end"] - clips[-1]["start"] <= CHUNK_LENGTH_S * SAMPLE_RATE:
+            clips[-1]["end"] = region["end"]
+        else:
+            clips.append(dict(region))
+    return clips
+
+
+def decode_batch(model, cancelled, requests, batch_size=WHISPER_BATCH_SIZE):
+    """
+    Decode several requests' audio in one batched faster-whisper run.
+
+    The recordings are laid end to end and their speech clips are passed
+    to BatchedInferencePipeline as explicit clip timestamps, so clips from
+    different requests share forward passes. Each returned segment is then
+    routed back to the request its clip came from.
+    Args:
+        model (WhisperModel): Leased replica.
+        cancelled (threading.Event): Stop early when set.
+        requests (list[tuple[np.ndarray, float]]): (audio, offset) per request.
+        batch_size (int): Clips per forward pass.
+    Returns:
+        list[tuple[list[TimedWord], dict | None]]: Words and segment
+        confidence (see segment_confidence) for each request, in request order.
+    """
+    pieces, trims, clips, clip_requests, starts = [], [], [], [], []
+    gap = int(REQUEST_GAP_S * SAMPLE_RATE)
+    cursor = 0
+    for index, (audio, _) in enumerate(requests):
+        if VAD_TRIM_ENABLED:
+            trimmed = trim_silence(audio, vad_options(max_speech_duration_s=CHUNK_LENGTH_S))
+            audio, request_clips = trimmed.audio, _pack_clips(trimmed.regions)
+            trims.append(trimmed)
+        else:
+            request_clips = _speech_clips(audio)
+            trims.append(None)
+        if index:
+            pieces.append(np.zeros(gap, dtype=audio.dtype))
+            cursor += gap
+        starts.append(cursor)
+        pieces.append(audio)
+        for clip in request_clips:
+            clips.append({"start": clip["start"] + cursor, "end": clip["end"] + cursor})
+            clip_requests.append(index)
+        cursor += len(audio)
+
+    results = [[] for _ in requests]
+    scores = [[] for _ in requests]
+    if not clips:
+        return [(words, None) for words in results]
+
+    audio = np.concatenate(pieces)
+    pipeline = BatchedInferencePipeline(model)
+    segments, _ = pipeline.transcribe(
+        audio,
+        clip_timestamps=clips,
+        # Otherwise detected from the first clip and applied to every
+        # request in the batch
+        language=WHISPER_LANGUAGE,
+        word_timestamps=True,
+        beam_size=WHISPER_BEAM_SIZE,
+        batch_size=batch_size,
+    )
+
+    # Segments carry no clip index, so each one is matched to its clip by
+    # time, with every clip's span widened by half the gap: a rounded start
+    # can then only fall in a clip of its own request, and the clip says
+    # which request that is
+    clip_bounds = [clip["start"] / SAMPLE_RATE - REQUEST_GAP_S / 2 for clip in clips]
+    start_times = [start / SAMPLE_RATE for start in starts]
+    for segment in segments:
+        if cancelled.is_set():
+            break
+        index = clip_requests[max(bisect.bisect_right(clip_bounds, segment.start) - 1, 0)]
+        shift = start_times[index]
+        scores[index].append((segment.end - segment.start, segment.avg_logprob, segment.no_speech_prob))
+        for word in segment.words:
+            results[index].append(TimedWord(word.word, word.start - shift, word.end - shift, word.probability))
+
+    # Back onto each request's own timeline: undo the trimming, then add its offset
+    for index, (_, offset) in enumerate(requests):
+        words = trims[index].restore(results[index]) if trims[index] is not None else results[index]
+        results[index] = [word._replace(start=word.start + offset, end=word.end + offset) for word in words]
+    return [(words, segment_confidence(score)) for words, score in zip(results, scores)]
+
+
+class WhisperBatchScheduler:
+    """
+    Micro-batching front end for the Whisper pool.
+
+    Requests that arrive within `window_ms` of the first waiting request
+    (up to `max_requests`) are decoded together on one leased replica. The
+    window is the only delay a lone request ever sees. Batches are
+    dispatched as tasks, so with several replicas several batches run at
+    once while the next one is being collected.
+    """
+
+    def __init__(self, pool, window_ms, max_requests, batch_size):
+        self.pool = pool
+        self.window = window_ms / 1000
+        self.max_requests = max_requests
+        self.batch_size = batch_size
+        self.batches = 0
+        self.batched_requests = 0
+        self._pending = []
+        self._arrived = None
+        self._worker = None
+        # Running dispatches, referenced so they are not garbage-collected
+        self._dispatches = set()
+
+    async def transcribe(self, audio, offset=0.0):
+        """Queue one request and wait for its (words, confidence)."""
+        if self._worker is None or self._worker.done():
+            self._arrived = asyncio.Event()
+            self._worker = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((audio, offset, future, time.monotonic()))
+        self._arrived.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            await self._arrived.wait()
+            self._arrived.clear()
+            if not self._pending:
+                continue
+
+            deadline = self._pending[0][3] + self.window
+            while len(self._pending) < self.max_requests:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._arrived.clear()
+
+            batch = [item for item in self._pending[:self.max_requests] if not item[2].done()]
+            del self._pending[:self.max_requests]
+            if self._pending:
+                self._arrived.set()
+            if batch:
+                task = asyncio.create_task(self._dispatch(batch))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        self.batches += 1
+        self.batched_requests += len(batch)
+        futures = [future for _, _, future, _ in batch]
+        run = asyncio.ensure_future(
+            self.pool.run(decode_batch, [(audio, offset) for audio, offset, _, _ in batch], self.batch_size)
+        )
+
+        def abandon(_):
+            # Once every caller has given up (e.g. the hedging loser), cancel
+            # the run: pool.run sets `cancelled` and frees the replica when
+            # the decode thread stops
+            if all(future.cancelled() for future in futures):
+                run.cancel()
+
+        for future in futures:
+            future.add_done_callback(abandon)
+        try:
+            results = await run
+        except asyncio.CancelledError:
+            if all(future.cancelled() for future in futures):
+                return
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def create_scheduler(pool):
+    return WhisperBatchScheduler(
+        pool,
+        WHISPER_BATCH_WINDOW_MS,
+        WHISPER_BATCH_MAX_REQUESTS,
+        WHISPER_BATCH_SIZE,
+    )
@@ -0,0 +1,54 @@
+import hashlib
+
+from Config.transcribeConfig import (
+    TRANSCRIPT_CACHE_DIR,
+    TRANSCRIPT_CACHE_DISK_MB,
+    TRANSCRIPT_CACHE_ENABLED,
+    TRANSCRIPT_CACHE_MEMORY_ITEMS,
+    TRANSCRIBE_LATENCY_BUDGET_S,
+    WHISPER_BEAM_SIZE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_MODEL_SIZE,
+    WHISPER_TIERS,
+)
+from tiered_cache import TieredCache
+
+# Part of every cache key, so changing the backend chain or the decoding
+# settings invalidates old transcripts instead of serving them. The tier
+# (Azure or the Whisper size) that produced a transcript is keyed separately.
+TRANSCRIBER_VERSION = f"azure-rest+whisper-{WHISPER_COMPUTE_TYPE}-beam{WHISPER_BEAM_SIZE}"
+
+transcript_cache = (
+    TieredCache(
+        TRANSCRIPT_CACHE_MEMORY_ITEMS,
+        TRANSCRIPT_CACHE_DIR,
+        TRANSCRIPT_CACHE_DISK_MB * 1024 * 1024,
+    )
+    if TRANSCRIPT_CACHE_ENABLED
+    else None
+)
+
+
+def transcript_cache_key(digest, structured=False, tier=WHISPER_MODEL_SIZE):
+    """
+    Content address of an uploaded recording for a given result shape.
+    Args:
+        digest (str): sha256 hex digest of the uploaded file.
+        structured (bool): Whether the result includes word timings.
+        tier (str): "azure" or the Whisper size that produced the transcript.
+    """
+    return hashlib.sha256(
+        f"{digest}|{TRANSCRIBER_VERSION}|structured={structured}|tier={tier}".encode()
+    ).hexdigest()
+
+
+def cached_tiers(latency_budget=None):
+    """
+    Tiers whose cached transcript can answer a request, best first. Without
+    a latency budget (its own or TRANSCRIBE_LATENCY_BUDGET_S) the request
+    would get Azure or the top Whisper tier, so a transcript from a smaller
+    tier is not served in their place.
+    """
+    if latency_budget is None and TRANSCRIBE_LATENCY_BUDGET_S is None:
+        return ["azure", WHISPER_MODEL_SIZE]
+    return ["azure"] + WHISPER_TIERS[::-1]
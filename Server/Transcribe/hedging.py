@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+from Config.transcribeConfig import (
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_ENABLED,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+)
+from Transcribe.tiering import resolve_budget
+from Transcribe.transcribe import transcribe_azure, transcribe_local
+
+
+class LatencyTracker:
+    """Rolling window of recent Azure latencies (seconds)."""
+
+    def __init__(self, window):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p, min_samples):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            return float(np.percentile(self._samples, p))
+
+
+class HedgePolicy:
+    """
+    Decides how long to give Azure before starting local Whisper as well.
+
+    With hedging disabled the delay is None, i.e. local Whisper only starts
+    once Azure has failed, which is the original fallback behaviour.
+    """
+
+    def __init__(self, enabled, percentile, min_samples, default_delay, min_delay, window):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.azure_latency = LatencyTracker(window)
+
+    def delay(self):
+        if not self.enabled:
+            return None
+        observed = self.azure_latency.percentile(self.percentile, self.min_samples)
+        if observed is None:
+            return self.default_delay
+        return max(self.min_delay, observed)
+
+
+hedge_policy = HedgePolicy(
+    HEDGE_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MIN_DELAY,
+    HEDGE_WINDOW,
+)
+
+# Which backend produced the returned transcript, plus how often the hedge fired
+hedge_stats = Counter()
+
+
+def _is_valid(output):
+    return bool(output and output.get("transcript", "").strip())
+
+
+def _shape(output, structured):
+    if structured:
+        output.setdefault("timing", None)
+    return output
+
+
+async def _timed_azure(wav_bytes):
+    started = time.monotonic()
+    try:
+        output = await transcribe_azure(wav_bytes)
+    except asyncio.CancelledError:
+        # The real latency is at least this long; keeping the censored sample
+        # stops a consistently slow Azure from never updating the window
+        hedge_policy.azure_latency.record(time.monotonic() - started)
+        raise
+    hedge_policy.azure_latency.record(time.monotonic() - started)
+    return output
+
+
+async def transcribe_hedged(audio, wav_bytes, structured=False, latency_budget=None):
+    """
+    Transcribe with Azure, hedged by local Whisper.
+
+    Azure starts immediately. If it has not returned a usable transcript
+    within the policy delay (or fails earlier), local Whisper starts too.
+    The first non-empty transcript wins and the other task is cancelled.
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 PCM for local Whisper.
+        wav_bytes (bytes): The same audio as a WAV body for Azure.
+        structured (bool): Ask local Whisper for word timings too. An Azure
+            result has none, so "timing" is then None.
+        latency_budget (float): Seconds for the whole request. Local Whisper
+            gets whatever is left of it when it starts, which picks its model
+            tier; without one it decodes on the top tier.
+    Returns:
+        dict: Transcription result containing the text.
+    Raises:
+        Exception: If both backends fail.
+    """
+    started = time.monotonic()
+    azure_task = asyncio.create_task(_timed_azure(wav_bytes))
+    backends = {azure_task: "azure"}
+    fallback, error = None, None
+
+    try:
+        await asyncio.wait({azure_task}, timeout=hedge_policy.delay())
+        if azure_task.done():
+            error = azure_task.exception()
+            if error is None and _is_valid(azure_task.result()):
+                hedge_stats["azure"] += 1
+                return _shape(azure_task.result(), structured)
+            fallback = None if error else azure_task.result()
+            print(f"Azure transcription failed: {error or 'empty transcript'}")
+            print("Falling back to local transcription...")
+        else:
+            hedge_stats["hedges_started"] += 1
+            print("Azure is slow, starting local transcription in parallel...")
+
+        budget = resolve_budget(latency_budget)
+        remaining = None if budget is None else max(0.0, budget - (time.monotonic() - started))
+        local_task = asyncio.create_task(transcribe_local(audio, structured=structured, latency_budget=remaining))
+        backends[local_task] = "local"
+
+        pending = {task for task in backends if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    print(f"{backends[task].capitalize()} transcription failed: {error}")
+                elif _is_valid(task.result()):
+                    hedge_stats[backends[task]] += 1
+                    return _shape(task.result(), structured)
+                else:
+                    fallback = task.result()
+    finally:
+        # Cancel the loser (or everything, if this request itself was cancelled)
+        for task in backends:
+            if not task.done():
+                task.cancel()
+
+    if fallback is not None:
+        hedge_stats["empty"] += 1
+        return _shape(fallback, structured)
+    raise error
@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from faster_whisper import WhisperModel
+
+from Config.transcribeConfig import (
+    LONG_AUDIO_CHUNK_S,
+    LONG_AUDIO_PROCESSES,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_MODEL_SIZE,
+)
+from Transcribe.audio_decode import SAMPLE_RATE
+from Transcribe.vad import speech_regions
+
+# Per-process state of the chunk workers
+_worker_model = None
+
+# Created on the first long recording; see _get_executor()
+_executor = None
+# Serves the cancel flags shared with the spawned chunk workers
+_manager = None
+_executor_lock = threading.Lock()
+
+
+def split_at_silence(audio, target_s=LONG_AUDIO_CHUNK_S):
+    """
+    Split a recording into chunks of roughly `target_s` seconds.
+
+    Cuts are only made in the middle of a silence between two voiced
+    regions, so no word is ever split across chunks.
+    Returns:
+        list[tuple[int, int]]: (start, end) sample ranges covering the whole recording.
+    """
+    regions = speech_regions(audio)
+    target = int(target_s * SAMPLE_RATE)
+    bounds = [0]
+    for previous, following in zip(regions, regions[1:]):
+        if following["start"] - bounds[-1] >= target:
+            bounds.append((previous["end"] + following["start"]) // 2)
+    bounds.append(len(audio))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _init_worker(model_size, compute_type, cpu_threads):
+    global _worker_model
+    _worker_model = WhisperModel(model_size, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(audio, offset, cancelled):
+    # Imported here because Transcribe.transcribe imports this module
+    from Transcribe.transcribe import _transcribe_words
+
+    return _transcribe_words(_worker_model, cancelled, audio, offset)
+
+
+def _get_executor():
+    global _executor, _manager
+    with _executor_lock:
+        if _manager is None:
+            _manager = multiprocessing.get_context("spawn").Manager()
+        if _executor is None:
+            # Split the cores between the workers instead of oversubscribing them.
+            # Spawned, not forked, because the server process already runs
+            # CTranslate2 and torch thread pools.
+            cpu_threads = max(1, (os.cpu_count() or 1) // LONG_AUDIO_PROCESSES)
+            _executor = ProcessPoolExecutor(
+                max_workers=LONG_AUDIO_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(WHISPER_MODEL_SIZE, WHISPER_COMPUTE_TYPE, cpu_threads),
+            )
+        return _executor, _manager
+
+
+def _discard_executor(broken):
+    # A worker that died (an OOM kill, say) breaks the whole pool for good;
+    # the next long recording gets a fresh one
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def transcribe_long(audio, offset=0.0):
+    """
+    Transcribe a long recording by decoding silence-bounded chunks in parallel.
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 PCM.
+        offset (float): Seconds added to every timestamp.
+    Returns:
+        list[TimedWord]: Words in order, with times relative to the original recording.
+    """
+    chunks = await asyncio.to_thread(split_at_silence, audio)
+    print(f"Long recording: {len(audio) / SAMPLE_RATE:.0f}s in {len(chunks)} chunks")
+
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        executor, manager = _get_executor()
+        cancelled = manager.Event()
+        futures = [
+            loop.run_in_executor(executor, _transcribe_chunk, audio[start:end], offset + start / SAMPLE_RATE, cancelled)
+            for start, end in chunks
+        ]
+        try:
+            results = await asyncio.gather(*futures)
+            break
+        except BaseException as e:
+            # Cancelled (Azure won the hedge, the client left) or a chunk
+            # failed: queued chunks never start and running ones stop at
+            # their next segment instead of decoding for minutes
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            if not isinstance(e, BrokenProcessPool):
+                raise
+            _discard_executor(executor)
+            if attempt:
+                raise
+            print("A long audio worker died; retrying on a new pool")
+
+    # Chunk words already carry recording-relative times, so stitching is
+    # concatenation; pauses across chunk boundaries come out of format_transcript
+    return [word for words, _ in results for word in words]
+
+
+def shutdown_long_audio():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    if _manager is not None:
+        _manager.shutdown()
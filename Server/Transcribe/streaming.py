@@ -0,0 +1,93 @@
+import asyncio
+
+import numpy as np
+
+from Config.transcribeConfig import (
+    STREAM_MAX_SEGMENT_S,
+    STREAM_MIN_NEW_AUDIO_S,
+    VAD_MIN_SILENCE_MS,
+)
+from Transcribe.audio_decode import SAMPLE_RATE
+from Transcribe.transcribe import transcribe_words
+from Transcribe.vad import speech_regions
+from Transcribe.words import format_transcript
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a recording that is still in progress.
+
+    Audio is fed in as it arrives. Whenever voice-activity detection shows
+    that an utterance has ended (it is followed by at least
+    VAD_MIN_SILENCE_MS of silence), the audio up to that point is cut off
+    and transcribed with the pooled Whisper model. Word times are kept
+    relative to the start of the recording, so pause markers between
+    segments are the same as for a single-pass transcription.
+    """
+
+    def __init__(self):
+        self.words = []
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pending_start = 0  # sample offset of _pending in the recording
+        self._new_samples = 0
+        self._min_new = int(STREAM_MIN_NEW_AUDIO_S * SAMPLE_RATE)
+        self._min_silence = int(VAD_MIN_SILENCE_MS * SAMPLE_RATE / 1000)
+        self._max_segment = int(STREAM_MAX_SEGMENT_S * SAMPLE_RATE)
+
+    @property
+    def transcript(self):
+        return format_transcript(self.words)
+
+    def feed(self, pcm16):
+        """Append a chunk of 16 kHz mono little-endian int16 PCM."""
+        chunk = np.frombuffer(pcm16, dtype="<i2").astype(np.float32) / 32768.0
+        self._pending = np.concatenate([self._pending, chunk])
+        self._new_samples += len(chunk)
+
+    def _find_cut(self, regions):
+        # Cut after the last utterance that is already followed by enough silence
+        closed = [r for r in regions if len(self._pending) - r["end"] >= self._min_silence]
+        if closed:
+            return closed[-1]["end"]
+        if len(self._pending) >= self._max_segment:
+            # Nobody has paused for a long time: cut before the utterance in
+            # progress, or failing that, everything buffered so far
+            if len(regions) > 1:
+                return regions[-1]["start"]
+            return len(self._pending)
+        return 0
+
+    async def transcribe_ready(self, final=False):
+        """
+        Transcribe every finished utterance buffered so far.
+        Args:
+            final (bool): Recording has stopped; transcribe whatever is left.
+        Returns:
+            bool: True if new words were added to the transcript.
+        """
+        if not final and self._new_samples < self._min_new:
+            return False
+        self._new_samples = 0
+
+        regions = await asyncio.to_thread(speech_regions, self._pending)
+        if not regions:
+            # Only silence so far; keep a short tail in case speech is starting
+            keep = min(len(self._pending), self._min_silence)
+            self._pending_start += len(self._pending) - keep
+            self._pending = self._pending[len(self._pending) - keep:]
+            return False
+
+        cut = len(self._pending) if final else self._find_cut(regions)
+        if cut == 0:
+            return False
+
+        # Skip the leading silence; it only matters for timing, which the offset keeps
+        start = regions[0]["start"]
+        segment = self._pending[start:cut]
+        offset = (self._pending_start + start) / SAMPLE_RATE
+        words = await transcribe_words(segment, offset=offset)
+
+        self.words.extend(words)
+        self._pending = self._pending[cut:]
+        self._pending_start += cut
+        return bool(words)
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import Counter
+
+from Config.transcribeConfig import (
+    TIER_MAX_NO_SPEECH_PROB,
+    TIER_MIN_AVG_LOGPROB,
+    TRANSCRIBE_LATENCY_BUDGET_S,
+    WHISPER_TIER_RTF,
+)
+from Transcribe.whisper_pool import whisper_pools
+
+
+class TierPolicy:
+    """
+    Chooses which resident Whisper model decodes a request.
+
+    A tier's expected latency is its real-time factor times the audio
+    duration, multiplied by the number of requests already queued per
+    replica. Without a latency budget the top tier decodes. Otherwise the
+    first pass goes to the largest tier that fits the budget (the smallest
+    one if none does). If that
+    pass comes back with low confidence (low average log-probability or a
+    high no-speech probability) and a larger tier still fits in what is
+    left of the budget, the audio is decoded again on the largest such
+    tier. Real-time factors start from config and are updated from
+    observed decodes.
+    """
+
+    def __init__(self, pools, rtf, min_avg_logprob, max_no_speech_prob, smoothing=0.2):
+        self.pools = pools
+        self.tiers = list(pools)
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+        self.smoothing = smoothing
+        self.stats = Counter()
+        self._rtf = {size: rtf.get(size, 1.0) for size in self.tiers}
+        self._lock = threading.Lock()
+
+    def load_factor(self, size):
+        pool = self.pools[size]
+        return pool.queue_depth // pool.replicas + 1
+
+    def estimate(self, size, duration):
+        """Expected seconds to decode `duration` seconds of audio on `size` right now."""
+        with self._lock:
+            rtf = self._rtf[size]
+        return rtf * duration * self.load_factor(size)
+
+    def _largest_fitting(self, candidates, duration, budget):
+        for size in reversed(candidates):
+            if self.estimate(size, duration) <= budget:
+                return size
+        return None
+
+    def choose(self, duration, budget):
+        if budget is None:
+            size = self.tiers[-1]
+        else:
+            size = self._largest_fitting(self.tiers, duration, budget) or self.tiers[0]
+        self.stats[f"first_pass:{size}"] += 1
+        return size
+
+    def is_confident(self, confidence):
+        # No segments means nothing to improve on; VAD already saw silence
+        if confidence is None:
+            return True
+        return (
+            confidence["avg_logprob"] >= self.min_avg_logprob
+            and confidence["no_speech_prob"] <= self.max_no_speech_prob
+        )
+
+    def upgrade(self, size, duration, remaining):
+        """Larger tier to redo a low-confidence pass on, or None to keep it."""
+        larger = self.tiers[self.tiers.index(size) + 1:]
+        choice = larger[-1] if larger and remaining is None else self._largest_fitting(larger, duration, remaining)
+        self.stats[f"upgrade:{choice}" if choice else "upgrade_skipped"] += 1
+        return choice
+
+    def observe(self, size, duration, started, load_factor):
+        """Fold one decode's measured real-time factor into the estimate."""
+        if duration <= 0:
+            return
+        rtf = (time.monotonic() - started) / duration / load_factor
+        with self._lock:
+            self._rtf[size] += self.smoothing * (rtf - self._rtf[size])
+
+    def snapshot(self):
+        with self._lock:
+            rtf = {size: round(value, 4) for size, value in self._rtf.items()}
+        return {
+            "tiers": self.tiers,
+            "rtf": rtf,
+            "queue_depth": {size: pool.queue_depth for size, pool in self.pools.items()},
+            "decisions": dict(self.stats),
+        }
+
+
+tier_policy = TierPolicy(
+    whisper_pools,
+    WHISPER_TIER_RTF,
+    TIER_MIN_AVG_LOGPROB,
+    TIER_MAX_NO_SPEECH_PROB,
+)
+
+
+def resolve_budget(latency_budget):
+    return TRANSCRIBE_LATENCY_BUDGET_S if latency_budget is None else latency_budget
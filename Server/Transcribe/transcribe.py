@@ -1,103 +1,189 @@
-from fastapi import FastAPI, File, UploadFile, requests
-from typing import List, Any
-import sys
+import asyncio
 import os
-from faster_whisper import WhisperModel
-import tempfile
-import subprocess
+import time
 from dotenv import load_dotenv
 load_dotenv()
-import numpy as np
-import requests
 
-# Add the path to import using_trained.py
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from faster_whisper import decode_audio
+
+from Config.transcribeConfig import (
+   LONG_AUDIO_PROCESSES,
+   LONG_AUDIO_THRESHOLD_S,
+   VAD_TRIM_ENABLED,
+   WHISPER_BATCH_ENABLED,
+   WHISPER_BEAM_SIZE,
+   WHISPER_MODEL_SIZE,
+)
+from Transcribe.audio_decode import SAMPLE_RATE
+from Transcribe.azure_client import AzureSpeechClient
+from Transcribe.batching import CHUNK_LENGTH_S, create_scheduler
+from Transcribe.long_audio import transcribe_long
+from Transcribe.tiering import resolve_budget, tier_policy
+from Transcribe.vad import trim_silence, vad_options
+from Transcribe.whisper_pool import whisper_pools
+from Transcribe.words import TimedWord, format_transcript, segment_confidence, transcript_timing
+
+# Shared micro-batching front end for each tier's pool (see Transcribe.batching)
+batch_schedulers = (
+   {size: create_scheduler(pool) for size, pool in whisper_pools.items()} if WHISPER_BATCH_ENABLED else {}
+)
+
+# Shared Azure client, created on first use by get_azure_client()
+azure_client = None
+
+
+def _transcribe_words(model, cancelled, audio, offset=0.0):
+   trimmed = None
+   if VAD_TRIM_ENABLED:
+      trimmed = trim_silence(audio, vad_options(max_speech_duration_s=CHUNK_LENGTH_S))
+      if not trimmed.regions:
+         return [], None
+      print(f"VAD removed {trimmed.silence_ratio:.0%} of the audio before decoding")
+      audio = trimmed.audio
+
+   segments, _ = model.transcribe(audio, word_timestamps=True, beam_size=WHISPER_BEAM_SIZE)
+
+   # Segments are decoded lazily, so iterating them is where the work happens
+   # and stopping early is how a cancelled request gives its model back
+   words, scores = [], []
+   for segment in segments:
+      if cancelled.is_set():
+         break
+      scores.append((segment.end - segment.start, segment.avg_logprob, segment.no_speech_prob))
+      for word in segment.words:
+         words.append(TimedWord(word.word, word.start, word.end, word.probability))
+
+   if trimmed is not None:
+      words = trimmed.restore(words)
+   words = [word._replace(start=word.start + offset, end=word.end + offset) for word in words]
+   return words, segment_confidence(scores)
+
+
+async def _decode_on_tier(size, audio, offset, duration):
+   started, load_factor = time.monotonic(), tier_policy.load_factor(size)
+   if size in batch_schedulers:
+      result = await batch_schedulers[size].transcribe(audio, offset)
+   else:
+      result = await whisper_pools[size].run(_transcribe_words, audio, offset)
+   tier_policy.observe(size, duration, started, load_factor)
+   return result
+
+
+async def transcribe_words(audio, offset=0.0, latency_budget=None):
+
+   """
+   Run local Whisper and return word-level timings; see transcribe_tiered.
+   """
 
-from Dementia_Models.predict_dementia import predict_from_input
-from Config.corsConfig import add_cors_middleware
-from schemas import PredictionRequest
+   words, _ = await transcribe_tiered(audio, offset, latency_budget)
+   return words
 
 
-async def transcribe_local(wav_file):
+async def transcribe_tiered(audio, offset=0.0, latency_budget=None):
 
    """
-   Transcribe audio file using local Whisper model.
+   Run local Whisper and return word-level timings and the tier that produced them.
    Args:
-       wav_file (str): Path to the WAV file to transcribe.
+       audio (np.ndarray | str): 16 kHz mono float32 PCM, or a path to an audio file.
+       offset (float): Seconds added to every timestamp, for audio cut out of a longer recording.
+       latency_budget (float): Seconds this call may take; picks the model tier
+          (see Transcribe.tiering). Defaults to TRANSCRIBE_LATENCY_BUDGET_S;
+          with no budget at all, WHISPER_MODEL_SIZE decodes.
    Returns:
-       dict: Transcription result containing the text.
+       tuple[list[TimedWord], str]: Words in order, with times relative to
+       the original recording, and the model size that decoded them.
+   """
+
+   started = time.monotonic()
+   if isinstance(audio, str):
+      audio = await asyncio.to_thread(decode_audio, audio)
+   if LONG_AUDIO_PROCESSES > 0 and len(audio) >= LONG_AUDIO_THRESHOLD_S * SAMPLE_RATE:
+      return await transcribe_long(audio, offset), WHISPER_MODEL_SIZE
+
+   budget = resolve_budget(latency_budget)
+   duration = len(audio) / SAMPLE_RATE
+   size = tier_policy.choose(duration, budget)
+   words, confidence = await _decode_on_tier(size, audio, offset, duration)
+
+   if not tier_policy.is_confident(confidence):
+      remaining = None if budget is None else budget - (time.monotonic() - started)
+      upgrade = tier_policy.upgrade(size, duration, remaining)
+      if upgrade is not None:
+         print(f"Low confidence from Whisper '{size}' ({confidence}), redoing on '{upgrade}'")
+         words, _ = await _decode_on_tier(upgrade, audio, offset, duration)
+         size = upgrade
+   return words, size
+
+
+async def transcribe_local(audio, structured=False, latency_budget=None):
+
+   """
+   Transcribe audio using local Whisper model.
+   Args:
+       audio (np.ndarray | str): 16 kHz mono float32 PCM, or a path to an audio file.
+       structured (bool): Also return word timings and pause/filler stats under "timing".
+       latency_budget (float): Seconds the local decode may take; see transcribe_words.
+   Returns:
+       dict: Transcription result containing the text and the Whisper "tier" that produced it.
    Raises:
        Exception: If transcription fails or if the file format is unsupported.
    """
 
-   model = WhisperModel("medium", compute_type="int8")
-   segments, _ = model.transcribe(wav_file, word_timestamps=True)
+   words, tier = await transcribe_tiered(audio, latency_budget=latency_budget)
 
-   words = []
-   for segment in segments:
-      words.extend(segment.words)
-
-   transcript = []
-   pause_threshold = 0.7  # seconds
-   for i, word in enumerate(words):
-      transcript.append(word.word)
-      if i < len(words) - 1:
-         gap = words[i + 1].start - word.end
-         if gap >= pause_threshold:
-               transcript.append(f"[pause {gap:.1f}s]")
-
-   final_transcript = " ".join(transcript)
+   final_transcript = format_transcript(words)
    print(f"Final transcript: {final_transcript}")
-   return {"transcript": final_transcript}
+   if structured:
+      return {"transcript": final_transcript, "timing": transcript_timing(words), "tier": tier}
+   return {"transcript": final_transcript, "tier": tier}
  
 
-async def transcribe_azure(wav_file):
+def get_azure_client():
 
    """
-      Transcribe audio file using Azure Speech service.
+   Return the shared Azure Speech client, creating it on first use.
+   Raises:
+       ValueError: If the Azure credentials are not set in the environment.
+   """
+
+   global azure_client
+   if azure_client is None:
+      speech_key = os.getenv("AZURE_SPEECH_KEY1")
+      speech_region = os.getenv("AZURE_SPEECH_REGION")
+      endpoint = os.getenv("AZURE_SPEECH_ENDPOINT")
+
+      if not speech_key or not speech_region or not endpoint:
+         print("Azure Speech service credentials are not set in environment variables.")
+         raise ValueError("Azure Speech service credentials are not set in environment variables.")
+
+      azure_client = AzureSpeechClient(endpoint, speech_key)
+   return azure_client
+
+
+async def transcribe_azure(wav_bytes):
+
+   """
+      Transcribe audio using Azure Speech service.
    Args:
-       wav_file (str): Path to the WAV file to transcribe.
+       wav_bytes (bytes): In-memory WAV body to upload.
    Returns:
        dict: Transcription result containing the text.
    Raises:
-       Exception: If transcription fails or if the file format is unsupported.
+       CircuitOpenError: If Azure is being skipped after repeated failures.
+       Exception: If transcription fails or if the audio is not a WAV body.
    """
 
-   speech_key = os.getenv("AZURE_SPEECH_KEY1")
-   speech_region = os.getenv("AZURE_SPEECH_REGION")
-   endpoint = os.getenv("AZURE_SPEECH_ENDPOINT")
-   
-   if not speech_key or not speech_region or not endpoint:
-      print("Azure Speech service credentials are not set in environment variables.")
-      raise ValueError("Azure Speech service credentials are not set in environment variables.")
-
-   if not os.path.exists(wav_file):
-      print(f"The file {wav_file} does not exist.")
-      raise FileNotFoundError(f"The file {wav_file} does not exist.")
-   
-   if not wav_file.endswith(".wav"):
-      print(f"The file {wav_file} is not a WAV file.")
-      raise ValueError("The file must be a WAV file.")
-
-   headers = {
-      "Ocp-Apim-Subscription-Key": speech_key,
-      "Content-Type": "audio/wav",
-      "Accept": "application/json",
-   }
-   
-   params = {
-      "language": "en-US",
-   }
-
-   with open(wav_file, "rb") as audio_file:
-      response = requests.post(endpoint, headers=headers, params=params, data=audio_file)
-      if response.status_code != 200:
-         raise Exception(f"Azure Speech API error: {response.status_code} - {response.text}") 
-
-   data = response.json()
-   if "DisplayText" not in data:
-      raise Exception("Azure Speech API did not return a valid transcript")
-
-   transcript = data["DisplayText"]
-   print(f"Final transcript: {transcript}")
-   return {"transcript": transcript}
+   if not wav_bytes.startswith(b"RIFF"):
+      print("The audio passed to Azure is not a WAV body.")
+      raise ValueError("The audio must be a WAV body.")
+
+   # Azure's simple REST format has no word timings, so it never fills "timing"
+   output = await get_azure_client().transcribe(wav_bytes)
+   output["tier"] = "azure"
+   print(f"Final transcript: {output['transcript']}")
+   return output
+
+
+async def azure_client_shutdown():
+   if azure_client is not None:
+      await azure_client.aclose()
@@ -0,0 +1,83 @@
+import numpy as np
+from faster_whisper.vad import SpeechTimestampsMap, VadOptions, get_speech_timestamps
+
+from Config.transcribeConfig import VAD_MIN_SILENCE_MS, VAD_SPEECH_PAD_MS, VAD_THRESHOLD
+from Transcribe.audio_decode import SAMPLE_RATE
+
+
+def vad_options(**overrides):
+    """Silero VAD options from config, with optional per-call overrides."""
+    options = {
+        "threshold": VAD_THRESHOLD,
+        "min_silence_duration_ms": VAD_MIN_SILENCE_MS,
+        "speech_pad_ms": VAD_SPEECH_PAD_MS,
+    }
+    options.update(overrides)
+    return VadOptions(**options)
+
+
+def speech_regions(audio, options=None):
+    """
+    Find the voiced regions of a recording.
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 PCM.
+        options (VadOptions): Defaults to `vad_options()`.
+    Returns:
+        list[dict]: {"start", "end"} sample offsets of each speech region, in order.
+    """
+    if len(audio) == 0:
+        return []
+    return get_speech_timestamps(audio, options or vad_options(), sampling_rate=SAMPLE_RATE)
+
+
+class TrimmedAudio:
+    """
+    A recording with its silent spans cut out, plus the map back to it.
+
+    Attributes:
+        audio (np.ndarray): Voiced regions laid end to end.
+        regions (list[dict]): {"start", "end"} of each region within `audio`.
+        silence_ratio (float): Share of the original recording removed.
+    """
+
+    def __init__(self, audio, regions):
+        self.original_length = len(audio)
+        self.audio = np.concatenate([audio[r["start"]:r["end"]] for r in regions]) if regions else audio[:0]
+        self.regions = []
+        cursor = 0
+        for region in regions:
+            length = region["end"] - region["start"]
+            self.regions.append({"start": cursor, "end": cursor + length})
+            cursor += length
+        self.silence_ratio = 1 - len(self.audio) / self.original_length if self.original_length else 0.0
+        self._map = SpeechTimestampsMap(regions, SAMPLE_RATE, time_precision=3) if regions else None
+
+    def restore(self, words):
+        """Map word times (seconds in `audio`) back onto the original recording."""
+        if self._map is None:
+            return []
+        restored = []
+        for word in words:
+            # Same rule faster-whisper uses: a word belongs to the region its midpoint is in
+            index = self._map.get_chunk_index((word.start + word.end) / 2)
+            restored.append(word._replace(
+                start=self._map.get_original_time(word.start, index),
+                end=self._map.get_original_time(word.end, index),
+            ))
+        return restored
+
+
+def trim_silence(audio, options=None):
+    """
+    Remove the silence between voiced regions before decoding.
+
+    Only silences longer than VAD_MIN_SILENCE_MS are cut (minus the speech
+    padding kept on each side), so short pauses stay in the audio and long
+    ones are restored from the offset map afterwards.
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 PCM.
+        options (VadOptions): Defaults to `vad_options()`.
+    Returns:
+        TrimmedAudio
+    """
+    return TrimmedAudio(audio, speech_regions(audio, options))
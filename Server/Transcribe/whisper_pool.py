@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from faster_whisper import WhisperModel
+
+from Config.transcribeConfig import (
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_CPU_THREADS,
+    WHISPER_MODEL_SIZE,
+    WHISPER_NUM_WORKERS,
+    WHISPER_REPLICAS,
+    WHISPER_TIERS,
+)
+
+
+class WhisperPool:
+    """
+    Fixed-size pool of resident faster-whisper replicas.
+
+    Replicas are loaded once (at startup via `warm`, or on first lease) and
+    leased to one request at a time. Callers that find every replica busy
+    wait on an asyncio.Queue, which serves them in arrival order.
+    """
+
+    def __init__(self, model_size, compute_type, cpu_threads=0, num_workers=1, replicas=1):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.replicas = max(1, replicas)
+        self._models = []
+        self._load_lock = threading.Lock()
+        self._idle = None
+        self._waiting = 0
+
+    def load(self):
+        """Load every replica synchronously. Safe to call more than once."""
+        with self._load_lock:
+            while len(self._models) < self.replicas:
+                print(f"Loading Whisper '{self.model_size}' replica {len(self._models) + 1}/{self.replicas}...")
+                self._models.append(
+                    WhisperModel(
+                        self.model_size,
+                        compute_type=self.compute_type,
+                        cpu_threads=self.cpu_threads,
+                        num_workers=self.num_workers,
+                    )
+                )
+        return self._models
+
+    async def warm(self):
+        """Load every replica without blocking the event loop."""
+        await asyncio.to_thread(self.load)
+
+    @property
+    def loaded(self):
+        return len(self._models) == self.replicas
+
+    @property
+    def queue_depth(self):
+        """Number of requests currently holding or waiting for a replica."""
+        return self._waiting
+
+    def _idle_queue(self):
+        # The queue is bound to the event loop that first leases from it, so it
+        # is created lazily rather than in __init__ (which may run before the
+        # server's loop exists).
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for model in self._models:
+                self._idle.put_nowait(model)
+        return self._idle
+
+    @asynccontextmanager
+    async def lease(self):
+        """Borrow a replica for the duration of the `async with` block."""
+        self._waiting += 1
+        try:
+            if not self.loaded:
+                await self.warm()
+            idle = self._idle_queue()
+            model = await idle.get()
+            try:
+                yield model
+            finally:
+                idle.put_nowait(model)
+        finally:
+            self._waiting -= 1
+
+    async def run(self, fn, *args):
+        """
+        Lease a replica and call `fn(model, cancelled, *args)` in a worker thread.
+
+        `cancelled` is a threading.Event that is set if the awaiting task is
+        cancelled; `fn` should check it between units of work and return early.
+        The replica is only handed back once the thread has actually finished,
+        so a cancelled caller never frees a model that is still decoding.
+        """
+        async with self.lease() as model:
+            cancelled = threading.Event()
+            future = asyncio.get_running_loop().run_in_executor(None, fn, model, cancelled, *args)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancelled.set()
+                await asyncio.wait([future])
+                raise
+
+
+# One resident pool per model tier (see Transcribe.tiering)
+whisper_pools = {
+    size: WhisperPool(
+        size,
+        WHISPER_COMPUTE_TYPE,
+        cpu_threads=WHISPER_CPU_THREADS,
+        num_workers=WHISPER_NUM_WORKERS,
+        replicas=WHISPER_REPLICAS,
+    )
+    for size in WHISPER_TIERS
+}
+
+# The full-quality model
+whisper_pool = whisper_pools[WHISPER_MODEL_SIZE]
@@ -0,0 +1,90 @@
+import re
+from collections import namedtuple
+
+# A word with its start/end time (seconds) in the original recording
+TimedWord = namedtuple("TimedWord", ["word", "start", "end", "probability"])
+
+PAUSE_THRESHOLD = 0.7  # seconds
+
+
+def format_transcript(words, pause_threshold=PAUSE_THRESHOLD):
+    """
+    Join words into a transcript, marking silent gaps as "[pause Xs]".
+    Args:
+        words (list[TimedWord]): Words in order.
+        pause_threshold (float): Minimum gap (seconds) that is written as a pause.
+    Returns:
+        str: The transcript text.
+    """
+    transcript = []
+    for i, word in enumerate(words):
+        transcript.append(word.word)
+        if i < len(words) - 1:
+            gap = words[i + 1].start - word.end
+            if gap >= pause_threshold:
+                transcript.append(f"[pause {gap:.1f}s]")
+    return " ".join(transcript)
+
+
+# Same filler pattern as linguistic_features.FILLER_PATTERN
+FILLER_PATTERN = re.compile(r"\b(uh|um)\b")
+
+
+def transcript_timing(words, pause_threshold=PAUSE_THRESHOLD):
+    """
+    Compact structured form of a transcription, for clients that want timing.
+
+    `words` together with `gaps` and `pause_threshold` reproduce the
+    transcript string exactly, so downstream feature code can use the word
+    list instead of re-tokenizing the text.
+    Args:
+        words (list[TimedWord]): Words in order.
+        pause_threshold (float): Gap (seconds) written as a pause marker.
+    Returns:
+        dict: words, starts, ends, gaps (len(words) - 1 entries),
+        pause_threshold and precomputed pause/filler stats.
+    """
+    text = [word.word.strip() for word in words]
+    # Gaps stay unrounded so pause markers rebuilt from them match the text
+    gaps = [words[i + 1].start - words[i].end for i in range(len(words) - 1)]
+    pauses = [gap for gap in gaps if gap >= pause_threshold]
+    fillers = sum(len(FILLER_PATTERN.findall(word.lower())) for word in text)
+
+    return {
+        "words": text,
+        "starts": [round(word.start, 3) for word in words],
+        "ends": [round(word.end, 3) for word in words],
+        "gaps": gaps,
+        "pause_threshold": pause_threshold,
+        "stats": {
+            "word_count": len(text),
+            "filler_count": fillers,
+            "pause_count": len(pauses),
+            "pause_total_s": round(sum(pauses), 3),
+            "pause_mean_s": round(sum(pauses) / len(pauses), 3) if pauses else 0.0,
+            "pause_max_s": round(max(pauses), 3) if pauses else 0.0,
+            "speech_duration_s": round(words[-1].end - words[0].start, 3) if words else 0.0,
+        },
+    }
+
+
+def segment_confidence(segments):
+    """
+    Duration-weighted decoder confidence of a transcription.
+    Args:
+        segments (list[tuple[float, float, float]]): (duration, avg_logprob,
+            no_speech_prob) of each decoded segment.
+    Returns:
+        dict | None: avg_logprob and no_speech_prob, or None if nothing was decoded.
+    """
+    if not segments:
+        return None
+    total = sum(max(duration, 0.0) for duration, _, _ in segments)
+    if total <= 0:
+        weights = [1 / len(segments)] * len(segments)
+    else:
+        weights = [max(duration, 0.0) / total for duration, _, _ in segments]
+    return {
+        "avg_logprob": sum(w * logprob for w, (_, logprob, _) in zip(weights, segments)),
+        "no_speech_prob": sum(w * no_speech for w, (_, _, no_speech) in zip(weights, segments)),
+    }
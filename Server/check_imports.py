@@ -0,0 +1,90 @@
+"""
+Import smoke check for the modules main.py is built from.
+
+Run from the Server directory before starting or deploying the server:
+
+    python check_imports.py
+
+Every project module main.py imports is imported on its own, in the order
+main.py imports it, and then main itself. A module that raises while
+importing (a syntax error, a bad call at module level, a missing name)
+is reported with its traceback and the check exits non-zero. A
+third-party package that is not installed in this environment is only
+reported as skipped, so the check can run without the full model stack;
+with `--strict` it fails too.
+"""
+import argparse
+import ast
+import importlib
+import os
+import sys
+import traceback
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_local(module):
+    top = module.split(".")[0]
+    return os.path.exists(os.path.join(SERVER_DIR, f"{top}.py")) or os.path.isdir(os.path.join(SERVER_DIR, top))
+
+
+def main_imports():
+    """The project modules main.py imports, in order."""
+    with open(os.path.join(SERVER_DIR, "main.py")) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        modules.extend(name for name in names if is_local(name) and name not in modules)
+    return modules + ["main"]
+
+
+def check(module):
+    """
+    Returns:
+        tuple[str, str]: ("ok" | "skipped" | "failed", detail).
+    """
+    try:
+        importlib.import_module(module)
+    except ModuleNotFoundError as e:
+        if e.name and not is_local(e.name):
+            return "skipped", f"{e.name} is not installed"
+        return "failed", traceback.format_exc()
+    except Exception:
+        return "failed", traceback.format_exc()
+    return "ok", ""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strict", action="store_true", help="Fail on third-party packages that are not installed")
+    return parser.parse_args()
+
+
+def run():
+    args = parse_args()
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+
+    failed = []
+    for module in main_imports():
+        status, detail = check(module)
+        print(f"{status:>8}  {module}" + (f" ({detail})" if status == "skipped" else ""))
+        if status == "failed":
+            print(detail)
+        if status == "failed" or (status == "skipped" and args.strict):
+            failed.append(module)
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print("OK: every module main.py imports loads")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class DynamicBatcher:
+    """
+    Merges concurrent requests for one model into shared forward passes.
+
+    Callers (request threads) `submit` a payload and block until its result
+    is ready. A single batching thread takes the oldest waiting payload,
+    keeps collecting until the batch holds `max_batch_size` rows or that
+    payload has waited `max_wait_ms`, and hands the whole batch to
+    `run_batch(payloads) -> results`, one result per payload in order.
+    Because only this thread runs the model, concurrent requests no longer
+    compete for torch's intra-op threads.
+
+    The thread starts on the first submit, so a pre-forking master that
+    only loads models never owns it (see serve.py).
+    """
+
+    def __init__(self, name, run_batch, max_batch_size, max_wait_ms, size_of=len, history=1000):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.size_of = size_of
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Counter()
+        self._waits = deque(maxlen=history)
+        self._queue = queue.Queue()
+        self._carry = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, payload):
+        """Queue one request's payload and wait for its result."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((payload, self.size_of(payload), future, time.monotonic()))
+        return future.result()
+
+    def _next(self, timeout=None):
+        # An item that did not fit in the previous batch goes first
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        if timeout is not None and timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        first = self._next()
+        batch, rows = [first], first[1]
+        deadline = first[3] + self.max_wait
+        while rows < self.max_batch_size:
+            # Past the deadline, still take whatever is already queued
+            try:
+                item = self._next(timeout=deadline - time.monotonic())
+            except queue.Empty:
+                break
+            if rows + item[1] > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            rows += item[1]
+        return batch, rows
+
+    def _loop(self):
+        while True:
+            batch, rows = self._collect()
+            started = time.monotonic()
+            with self._lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.batch_sizes[rows] += 1
+                self._waits.extend(started - enqueued for _, _, _, enqueued in batch)
+            try:
+                results = self.run_batch([payload for payload, _, _, _ in batch])
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "mean_requests_per_batch": self.requests / self.batches if self.batches else None,
+                "batch_rows": dict(sorted(self.batch_sizes.items())),
+                "queue_wait_ms": {
+                    "mean": float(waits.mean()),
+                    "p50": float(np.percentile(waits, 50)),
+                    "p95": float(np.percentile(waits, 95)),
+                } if len(waits) else None,
+            }
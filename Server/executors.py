@@ -0,0 +1,125 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Config.executorConfig import (
+    ANXIETY_QUEUE,
+    ANXIETY_WORKERS,
+    DEMENTIA_QUEUE,
+    DEMENTIA_WORKERS,
+    DEPRESSION_QUEUE,
+    DEPRESSION_WORKERS,
+    EXECUTOR_DEFAULT_RETRY_AFTER,
+)
+
+
+class ExecutorSaturated(Exception):
+    """Raised instead of queueing when a model family's executor is full."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"The {name} service is busy, retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool for one model family, with admission control.
+
+    At most `workers` jobs run at once and at most `queue_size` more wait
+    for a thread. A job that would exceed that is rejected immediately with
+    ExecutorSaturated rather than queued, so a burst of heavy requests
+    cannot tie up the event loop or the other families' capacity. The
+    suggested Retry-After is the time the backlog ahead would take to drain
+    at the recent average job duration.
+    """
+
+    def __init__(self, name, workers, queue_size, default_retry_after=EXECUTOR_DEFAULT_RETRY_AFTER):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.default_retry_after = default_retry_after
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._in_flight = 0
+        self._mean_duration = None
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        with self._lock:
+            if self._mean_duration is None:
+                return math.ceil(self.default_retry_after)
+            rounds = math.ceil(self._in_flight / self.workers)
+            return max(1, math.ceil(rounds * self._mean_duration))
+
+    def _timed(self, fn, args):
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                self.completed += 1
+                self._mean_duration = (
+                    duration if self._mean_duration is None else self._mean_duration + 0.2 * (duration - self._mean_duration)
+                )
+
+    def submit(self, fn, *args):
+        """
+        Admit `fn(*args)` and queue it on this family's threads.
+        Returns:
+            concurrent.futures.Future: The job's result.
+        Raises:
+            ExecutorSaturated: If every worker is busy and the queue is full.
+        """
+        with self._lock:
+            admitted = self._in_flight < self.workers + self.queue_size
+            if admitted:
+                self._in_flight += 1
+            else:
+                self.rejected += 1
+        if not admitted:
+            raise ExecutorSaturated(self.name, self.retry_after())
+
+        # The slot is released when the job itself ends (or is dropped from the
+        # queue), not when the caller stops waiting, since a running thread
+        # cannot be interrupted
+        future = self._executor.submit(self._timed, fn, args)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        """
+        Run `fn(*args)` on this family's threads.
+        Raises:
+            ExecutorSaturated: If every worker is busy and the queue is full.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _release(self, _):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "mean_duration_s": self._mean_duration,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+anxiety_executor = BoundedExecutor("anxiety", ANXIETY_WORKERS, ANXIETY_QUEUE)
+depression_executor = BoundedExecutor("depression", DEPRESSION_WORKERS, DEPRESSION_QUEUE)
+dementia_executor = BoundedExecutor("dementia", DEMENTIA_WORKERS, DEMENTIA_QUEUE)
+
+executors = [anxiety_executor, depression_executor, dementia_executor]
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from functools import partial
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from Config.jobConfig import JOB_EVENTS_HEARTBEAT_S, JOB_EVENTS_POLL_S, JOB_STORE_PATH, JOB_TTL_S
+from executors import ExecutorSaturated
+
+# Stages a job reports as it goes: decode, preprocess, infer, persist
+# (not every kind of job has every stage; only jobs that save a record
+# report persist)
+FINISHED = ("done", "failed")
+
+
+class JobStore:
+    """
+    SQLite table of asynchronous jobs and their progress.
+
+    Every call opens its own connection, so the store can be used from the
+    executor threads that run the jobs and from every worker process of a
+    pre-forked server. Finished jobs are kept for `ttl` seconds; expired
+    rows are treated as missing and purged whenever a job is created.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        # One transaction on a fresh connection, committed and closed on exit
+        with self._init_lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with closing(sqlite3.connect(self.path)) as connection, connection:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS jobs (
+                            id TEXT PRIMARY KEY,
+                            kind TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            stage TEXT,
+                            events TEXT NOT NULL,
+                            result TEXT,
+                            error TEXT,
+                            created REAL NOT NULL,
+                            updated REAL NOT NULL,
+                            expires REAL
+                        )
+                        """
+                    )
+                self._initialized = True
+        with closing(sqlite3.connect(self.path, timeout=10)) as connection, connection:
+            yield connection
+
+    def create(self, kind):
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE expires IS NOT NULL AND expires < ?", (now,))
+            connection.execute(
+                "INSERT INTO jobs (id, kind, status, events, created, updated) VALUES (?, ?, 'queued', '[]', ?, ?)",
+                (job_id, kind, now, now),
+            )
+        return job_id
+
+    def delete(self, job_id):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def set_stage(self, job_id, stage):
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute("SELECT stage, events FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[0] == stage:
+                return
+            events = json.loads(row[1]) + [{"stage": stage, "at": now}]
+            connection.execute(
+                "UPDATE jobs SET status = 'running', stage = ?, events = ?, updated = ? WHERE id = ?",
+                (stage, json.dumps(events), now, job_id),
+            )
+
+    def finish(self, job_id, result=None, error=None):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ?, expires = ? WHERE id = ?",
+                (
+                    "failed" if error is not None else "done",
+                    json.dumps(result) if result is not None else None,
+                    json.dumps(error) if error is not None else None,
+                    now,
+                    now + self.ttl,
+                    job_id,
+                ),
+            )
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT id, kind, status, stage, events, result, error, created, updated, expires"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None or (row[9] is not None and row[9] < time.time()):
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "events": json.loads(row[4]),
+            "result": json.loads(row[5]) if row[5] is not None else None,
+            "error": json.loads(row[6]) if row[6] is not None else None,
+            "created": row[7],
+            "updated": row[8],
+            "expires": row[9],
+        }
+
+
+job_store = JobStore(JOB_STORE_PATH, JOB_TTL_S)
+
+# Running jobs by input key, so a duplicate submission joins the running job
+_active = {}
+_active_lock = threading.Lock()
+
+
+def _run_job(job_id, fn, key):
+    # Runs on the executor thread, so the store is written synchronously
+    try:
+        result = fn(progress=partial(job_store.set_stage, job_id))
+        job_store.finish(job_id, result=jsonable_encoder(result))
+    except HTTPException as e:
+        job_store.finish(job_id, error={"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        job_store.finish(job_id, error={"status_code": 500, "detail": str(e)})
+    finally:
+        with _active_lock:
+            if _active.get(key) == job_id:
+                del _active[key]
+
+
+def _links(job_id):
+    return {
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+    }
+
+
+def _start_job(kind, executor, fn, args, key):
+    with _active_lock:
+        if key is not None and key in _active:
+            print(f"Joining the running {kind} job for the same input")
+            return _links(_active[key])
+
+        job_id = job_store.create(kind)
+        try:
+            executor.submit(_run_job, job_id, partial(fn, *args), key)
+        except ExecutorSaturated:
+            job_store.delete(job_id)
+            raise
+        if key is not None:
+            _active[key] = job_id
+    return _links(job_id)
+
+
+async def start_job(kind, executor, fn, *args, key=None):
+    """
+    Run `fn(*args, progress=...)` on `executor` as a background job.
+
+    `progress(stage)` records the stage the job has reached. The job is
+    admitted (or rejected with ExecutorSaturated) before this returns, so a
+    job id always refers to work that will run. If `key` (a hash of the
+    inputs) matches a job that is still running, that job is returned
+    instead of starting a duplicate. The SQLite writes (and the wait for
+    another worker's lock on the store) happen on a thread, not on the
+    event loop.
+    Returns:
+        dict: job_id plus the URLs to poll and to stream progress from.
+    """
+    return await asyncio.to_thread(_start_job, kind, executor, fn, args, key)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def job_events(job_id):
+    """
+    Server-sent events for one job: a "stage" event for every stage it
+    reaches, then a final "done" (with the result) or "failed" event.
+    """
+    sent = 0
+    last_write = time.monotonic()
+    while True:
+        job = await asyncio.to_thread(job_store.get, job_id)
+        if job is None:
+            yield _sse("failed", {"status_code": 404, "detail": "Job not found or expired"})
+            return
+
+        for event in job["events"][sent:]:
+            yield _sse("stage", event)
+            last_write = time.monotonic()
+        sent = len(job["events"])
+
+        if job["status"] in FINISHED:
+            yield _sse(job["status"], job["result"] if job["status"] == "done" else job["error"])
+            return
+
+        # Comment lines keep proxies from closing an idle stream
+        if time.monotonic() - last_write >= JOB_EVENTS_HEARTBEAT_S:
+            yield ": keep-alive\n\n"
+            last_write = time.monotonic()
+        await asyncio.sleep(JOB_EVENTS_POLL_S)
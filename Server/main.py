@@ -1,22 +1,49 @@
-from fastapi import FastAPI, File, HTTPException, UploadFile
+import asyncio
+import hashlib
+import io
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
 import sys
 import os
-import tempfile
-import subprocess
 
 # Add the path to import using_trained.py
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from Dementia_Models.predict_dementia import predict_from_input
+from Dementia_Models.predict_dementia import bert_batcher, predict_from_input, predict_many, speech_cache, speech_encoder
 from Config.corsConfig import add_cors_middleware
-from schemas import PredictionRequest
-from Transcribe.transcribe import transcribe_local
-from Transcribe.transcribe import transcribe_azure
+from schemas import PredictionRequest, UploadInit
+from Transcribe.transcribe import azure_client_shutdown
+from Transcribe.hedging import transcribe_hedged, hedge_policy, hedge_stats
+from Transcribe.streaming import StreamingTranscriber
+from Transcribe.cache import cached_tiers, transcript_cache, transcript_cache_key
+from Transcribe.long_audio import shutdown_long_audio
+from Transcribe.tiering import tier_policy
+from Transcribe.whisper_pool import whisper_pools
+from Transcribe.audio_decode import decode_upload, pcm_to_wav_bytes
+from Config.transcribeConfig import WHISPER_WARM_ON_STARTUP
+from Config.inferenceConfig import DEMENTIA_BATCH_MAX_ITEMS
+from memory_stats import worker_memory
 from Config.dbConfig import SessionLocal,engine, Base
 from Models.dementia_model import DementiaModel
-from Depression_module.predictor import predict_depression
+from Depression_module.predictor import cbramod_batcher, predict_depression
 from Depression_module.severity import predict_severity
 from Anxiety_Module.anxiety_predictor import predict_anxiety
+from jobs import job_events, job_store, start_job
+from single_flight import content_hash, predictions
+from uploads import chunked_uploads
+from executors import (
+    ExecutorSaturated,
+    anxiety_executor,
+    dementia_executor,
+    depression_executor,
+    executors,
+)
 
 # Create or update tables
 Base.metadata.create_all(bind=engine)
@@ -25,103 +52,361 @@ app = FastAPI()
 add_cors_middleware(app)
 
 
-@app.post("/api/dementia/transcribe/")
-async def transcribe_audio(file: UploadFile = File(...)):
+@app.on_event("startup")
+async def warm_whisper_pool():
+    # Load the local Whisper replicas up front so the first Azure fallback
+    # does not pay the model load
+    if WHISPER_WARM_ON_STARTUP:
+        for pool in whisper_pools.values():
+            await pool.warm()
 
-    print("Received file for transcription:", file.filename)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp_in:
-        tmp_in.write(await file.read())
-        tmp_in.flush()
+@app.on_event("startup")
+async def warm_speech_encoder():
+    # Creates the ONNX Runtime session in this worker; no-op for PyTorch
+    await asyncio.to_thread(speech_encoder.warm)
 
-    wav_file = tmp_in.name.replace(".webm", ".wav")
 
-    # Convert to WAV using ffmpeg
+@app.on_event("shutdown")
+async def close_azure_client():
+    await azure_client_shutdown()
+    shutdown_long_audio()
+    for executor in executors:
+        executor.shutdown()
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated(request: Request, exc: ExecutorSaturated):
+    # Fail fast instead of queueing without bound; clients back off and retry
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def transcribe_recording(data, structured=False, latency_budget=None, digest=None):
+
+    """
+    Transcribe one uploaded recording: cache lookup, in-memory decode, then
+    Azure hedged by local Whisper.
+    Args:
+        data (bytes | str): The uploaded audio file, or a spooled upload's path.
+        structured (bool): Also return word timings under "timing".
+        latency_budget (float): Seconds the transcription may take.
+        digest (str): sha256 of the file; computed from `data` bytes if omitted.
+    Returns:
+        dict: Transcription result containing the text.
+    Raises:
+        HTTPException: If decoding or transcription fails.
+    """
+
+    # Retries of the same recording are answered from the cache, but only
+    # with a transcript from a tier this request would accept
+    digest = digest or hashlib.sha256(data).hexdigest()
+    if transcript_cache is not None:
+        for tier in cached_tiers(latency_budget):
+            # Disk reads, mtime updates and eviction scans stay off the event loop
+            cached = await asyncio.to_thread(transcript_cache.get, transcript_cache_key(digest, structured, tier))
+            if cached is not None:
+                print(f"Returning cached transcript from {tier}")
+                return cached
+
+    # Decode straight to 16 kHz mono PCM in memory; Whisper takes the array
+    # and Azure gets a WAV body built from it, so nothing touches the disk
     try:
-        subprocess.run(
-            ["ffmpeg", "-i", tmp_in.name, "-ar", "16000", "-ac", "1", wav_file],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=True
-        )
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="FFmpeg not found. Please install FFmpeg and add it to your PATH.")
-    except subprocess.CalledProcessError:
+        audio = await decode_upload(data)
+    except ValueError:
         raise HTTPException(status_code=500, detail="Audio conversion failed.")
+    wav_bytes = pcm_to_wav_bytes(audio)
 
     try:
-        output = await transcribe_azure(wav_file)
+        output = await transcribe_hedged(audio, wav_bytes, structured=structured, latency_budget=latency_budget)
     except Exception as e:
-        print(f"Azure transcription failed: {e}")
-        print("Falling back to local transcription...")
-        output = await transcribe_local(wav_file)
-
-    if output == {"transcript": ""}:
-        output = {"transcript": "(Empty result!)"}
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {e}")
 
-    # Clean up temporary files
-    os.remove(tmp_in.name)
-    os.remove(wav_file)
+    if output["transcript"] == "":
+        output["transcript"] = "(Empty result!)"
+    elif transcript_cache is not None:
+        await asyncio.to_thread(
+            transcript_cache.set, transcript_cache_key(digest, structured, output.get("tier")), output
+        )
 
     return output
 
 
+@app.post("/api/dementia/transcribe/")
+async def transcribe_audio(
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = None,
+    structured: bool = False,
+    latency_budget: Optional[float] = None,
+):
+
+    if upload_id is not None:
+        # A finalized chunked upload is decoded straight from its spool file
+        filename, path, digest = chunked_uploads.resolve(upload_id)
+        print("Transcribing chunked upload:", filename)
+        return await transcribe_recording(path, structured, latency_budget, digest=digest)
+    if file is None:
+        raise HTTPException(status_code=400, detail="Send a file or an upload_id")
+
+    print("Received file for transcription:", file.filename)
+    data = await file.read()
+    return await transcribe_recording(data, structured, latency_budget)
+
+
+@app.post("/api/dementia/transcribe/all/")
+async def transcribe_all_recordings(
+    ctd: UploadFile = File(...),
+    pft: UploadFile = File(...),
+    sft: UploadFile = File(...),
+    structured: bool = False,
+    latency_budget: Optional[float] = None,
+):
+
+    # The three recordings of the dementia form in one request, transcribed
+    # concurrently so the response takes about as long as the slowest one
+    uploads = {"CTD": ctd, "PFT": pft, "SFT": sft}
+    print("Received recordings for transcription:", {name: f.filename for name, f in uploads.items()})
+
+    async def transcribe_named(name, upload):
+        data = await upload.read()
+        try:
+            return await transcribe_recording(data, structured, latency_budget)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"{name} recording: {e.detail}")
+
+    tasks = [asyncio.create_task(transcribe_named(name, upload)) for name, upload in uploads.items()]
+    try:
+        outputs = await asyncio.gather(*tasks)
+    finally:
+        # One failed recording fails the request; stop decoding the others
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    # Keys match schemas.SpeechInput, so the result can be posted to /api/dementia/predict
+    # ("tiers", which backend or Whisper size produced each one, is ignored there)
+    result = {"tiers": {}}
+    for name, output in zip(uploads, outputs):
+        result[f"Transcript_{name}"] = output["transcript"]
+        result["tiers"][name] = output.get("tier")
+        if structured:
+            result[f"Timing_{name}"] = output["timing"]
+    return result
+
+
+@app.websocket("/api/dementia/transcribe/stream")
+async def transcribe_stream(websocket: WebSocket):
+    """
+    Streaming transcription while the user is still recording.
+
+    The client sends binary frames of 16 kHz mono little-endian int16 PCM
+    and the text frame "stop" when recording ends. The server replies with
+    {"type": "partial", "transcript": ...} each time an utterance finishes,
+    then {"type": "final", "transcript": ...} and closes.
+    """
+    await websocket.accept()
+    stream = StreamingTranscriber()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                stream.feed(message["bytes"])
+                if await stream.transcribe_ready():
+                    await websocket.send_json({"type": "partial", "transcript": stream.transcript})
+            elif message.get("text") == "stop":
+                break
+
+        await stream.transcribe_ready(final=True)
+        await websocket.send_json({"type": "final", "transcript": stream.transcript or "(Empty result!)"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("Streaming transcription client disconnected")
+
+
+@app.get("/api/dementia/transcribe/stats")
+def transcribe_stats():
+    # Backend win counts (to tune the hedging percentile), Whisper tier
+    # decisions and cache hit rates
+    return {
+        "wins": dict(hedge_stats),
+        "hedge_delay": hedge_policy.delay(),
+        "tiers": tier_policy.snapshot(),
+        "cache": transcript_cache.stats() if transcript_cache is not None else None,
+    }
+
+
 @app.post("/api/dementia/predict")
-def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest, job: bool = False):
+    if job:
+        return JSONResponse(
+            status_code=202,
+            content=await start_job(
+                "dementia", dementia_executor, run_dementia_prediction, request, key=dementia_key(request)
+            ),
+        )
+    return await assess_dementia(request)
+
 
-    manual_input = request.clinical.dict()
-    transcript_ctd = request.speech.Transcript_CTD
-    transcript_pft = request.speech.Transcript_PFT
-    transcript_sft = request.speech.Transcript_SFT
+def dementia_key(request):
+    # Identical submissions (double clicks, client retries) share one run
+    return ("dementia", content_hash(request.model_dump_json()))
 
-    result = predict_from_input(
-        manual_input, transcript_ctd, transcript_pft, transcript_sft
+
+async def assess_dementia(request):
+    return await predictions.do(
+        dementia_key(request), lambda: dementia_executor.run(run_dementia_prediction, request)
     )
 
+
+def dementia_inputs(request):
+    # predict_many's inputs for one request: clinical fields and transcripts
+    speech = request.speech
+    timing_ctd = speech.Timing_CTD.dict() if speech.Timing_CTD else None
+    return request.clinical.dict(), (speech.Transcript_CTD, speech.Transcript_PFT, speech.Transcript_SFT, timing_ctd)
+
+
+def native_result(result):
     # Convert numpy.float32 to native Python types
     result["clinical_proba"] = float(result["clinical_proba"])
     result["speech_proba"] = float(result["speech_proba"])
     result["meta_proba"] = float(result["meta_proba"])
+    return result
 
-    # Save the record to the database
+
+def dementia_record(manual_input, transcripts, result):
+    transcript_ctd, transcript_pft, transcript_sft, _ = transcripts
+    return DementiaModel(
+        # Clinical fields
+        age=manual_input["Age"],
+        gender=manual_input["Gender"],
+        bmi=manual_input["BMI"],
+        family_history_alzheimers=manual_input["FamilyHistoryAlzheimers"],
+        hypertension=manual_input["Hypertension"],
+        cardiovascular_disease=manual_input["CardiovascularDisease"],
+        mmse=manual_input["MMSE"],
+        adl=manual_input["ADL"],
+        functional_assessment=manual_input["FunctionalAssessment"],
+        memory_complaints=manual_input["MemoryComplaints"],
+        behavioral_problems=manual_input["BehavioralProblems"],
+        # Speech fields
+        transcript_ctd=transcript_ctd,
+        transcript_pft=transcript_pft,
+        transcript_sft=transcript_sft,
+        # Prediction results
+        clinical_pred=result["clinical_pred"],
+        clinical_proba=result["clinical_proba"],
+        speech_pred=result["speech_pred"],
+        speech_proba=result["speech_proba"],
+        meta_pred=result["meta_pred"],
+        meta_proba=result["meta_proba"],
+    )
+
+
+def save_dementia_records(records):
     db = SessionLocal()
     try:
-        record = DementiaModel(
-            # Clinical fields
-            age=manual_input["Age"],
-            gender=manual_input["Gender"],
-            bmi=manual_input["BMI"],
-            family_history_alzheimers=manual_input["FamilyHistoryAlzheimers"],
-            hypertension=manual_input["Hypertension"],
-            cardiovascular_disease=manual_input["CardiovascularDisease"],
-            mmse=manual_input["MMSE"],
-            adl=manual_input["ADL"],
-            functional_assessment=manual_input["FunctionalAssessment"],
-            memory_complaints=manual_input["MemoryComplaints"],
-            behavioral_problems=manual_input["BehavioralProblems"],
-            # Speech fields
-            transcript_ctd=transcript_ctd,
-            transcript_pft=transcript_pft,
-            transcript_sft=transcript_sft,
-            # Prediction results
-            clinical_pred=result["clinical_pred"],
-            clinical_proba=result["clinical_proba"],
-            speech_pred=result["speech_pred"],
-            speech_proba=result["speech_proba"],
-            meta_pred=result["meta_pred"],
-            meta_proba=result["meta_proba"],
-        )
-        db.add(record)
+        db.add_all(records)
         db.commit()
-        db.refresh(record)
     except Exception as e:
         db.rollback()
         print(f"Error saving to database: {e}")
     finally:
         db.close()
 
+
+def run_dementia_prediction(request, progress=None):
+
+    manual_input, transcripts = dementia_inputs(request)
+    transcript_ctd, transcript_pft, transcript_sft, timing_ctd = transcripts
+
+    result = native_result(predict_from_input(
+        manual_input, transcript_ctd, transcript_pft, transcript_sft, timing_ctd=timing_ctd, progress=progress
+    ))
+
+    # Save the record to the database
+    if progress is not None:
+        progress("persist")
+    save_dementia_records([dementia_record(manual_input, transcripts, result)])
+
     return result
 
+
+def run_dementia_batch(batch, progress=None):
+    manual_inputs, transcripts = zip(*[dementia_inputs(request) for request in batch])
+    try:
+        reports = [
+            {"status": "ok", "result": native_result(result)}
+            for result in predict_many(list(manual_inputs), list(transcripts), progress=progress)
+        ]
+    except Exception as e:
+        # One bad item fails the whole matrix; run the items one at a time
+        # so the others still get their results
+        print(f"Batch dementia prediction failed ({e}); retrying item by item")
+        reports = []
+        for manual_input, item in zip(manual_inputs, transcripts):
+            try:
+                reports.append({"status": "ok", "result": native_result(predict_many([manual_input], [item])[0])})
+            except (ValueError, KeyError) as item_error:
+                # Input the preprocessor or models reject (an unknown
+                # category, a missing field) is the client's to fix
+                reports.append({"status": "failed", "error": {"status_code": 422, "detail": str(item_error)}})
+            except Exception as item_error:
+                reports.append({"status": "failed", "error": {"status_code": 500, "detail": str(item_error)}})
+
+    # One transaction for every record of the batch
+    if progress is not None:
+        progress("persist")
+    save_dementia_records([
+        dementia_record(manual_input, item, report["result"])
+        for manual_input, item, report in zip(manual_inputs, transcripts, reports)
+        if report["status"] == "ok"
+    ])
+
+    return {
+        "count": len(reports),
+        "failed": sum(report["status"] == "failed" for report in reports),
+        "results": reports,
+    }
+
+
+@app.post("/api/dementia/predict/batch")
+async def predict_batch(batch: List[PredictionRequest], job: bool = False):
+    """
+    Dementia predictions for a list of /api/dementia/predict bodies.
+
+    The whole list runs as one job on the dementia executor, with every
+    model called once on all the items (see predict_dementia.predict_many).
+    Results come back in request order, each with its own status, and the
+    records are inserted in a single transaction.
+    """
+    if not batch:
+        raise HTTPException(status_code=400, detail="The batch is empty")
+    if len(batch) > DEMENTIA_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"A batch may hold at most {DEMENTIA_BATCH_MAX_ITEMS} assessments"
+        )
+
+    key = ("dementia-batch", content_hash(*[request.model_dump_json() for request in batch]))
+    if job:
+        return JSONResponse(
+            status_code=202,
+            content=await start_job("dementia-batch", dementia_executor, run_dementia_batch, batch, key=key),
+        )
+    return await predictions.do(key, lambda: dementia_executor.run(run_dementia_batch, batch))
+
+
+@app.get("/api/dementia/predict/stats")
+def predict_stats():
+    # Hit rates of the speech branch memo (features, embeddings, probabilities)
+    return {"speech_cache": speech_cache.stats()}
+
+
 #get all records 
 @app.get("/api/dementia/records")
 def getRecords():
@@ -139,20 +424,74 @@ def getRecords():
    return result
 
 @app.post("/api/depression/predict/")
-async def predict(file: UploadFile = File(...)):
-    if not file.filename.endswith('.edf'):
+async def predict(file: Optional[UploadFile] = File(None), upload_id: Optional[str] = None, job: bool = False):
+    filename, source, digest = await edf_input(file, upload_id)
+    if job:
+        return JSONResponse(
+            status_code=202,
+            content=await start_job(
+                "depression", depression_executor, run_depression_prediction, filename, source,
+                key=depression_key(filename, digest),
+            ),
+        )
+    return await assess_depression_upload(filename, source, digest)
+
+
+async def edf_input(file, upload_id):
+    """
+    The EDF of a depression request, from the request body or a finalized
+    chunked upload (which stays in its spool file instead of memory).
+    Returns:
+        tuple[str, bytes | str, str]: (filename, contents or spool path, sha256).
+    """
+    if upload_id is not None:
+        filename, source, digest = chunked_uploads.resolve(upload_id)
+    elif file is not None:
+        filename, source = file.filename, await file.read()
+        digest = hashlib.sha256(source).hexdigest()
+    else:
+        raise HTTPException(status_code=400, detail="Send a file or an upload_id")
+    if not filename.endswith('.edf'):
         raise HTTPException(status_code=400, detail="Only .edf files are supported")
+    return filename, source, digest
+
+
+def depression_key(filename, digest):
+    # The file name is part of the key because predict_severity looks it up
+    return ("depression", content_hash(filename, digest))
 
-    # Save uploaded file temporarily
-    temp_path = f"./temp_{file.filename}"
-    contents = await file.read()
-    with open(temp_path, "wb") as f:
-        f.write(contents)
 
+async def assess_depression_upload(filename, source, digest):
+    return await predictions.do(
+        depression_key(filename, digest),
+        lambda: depression_executor.run(run_depression_prediction, filename, source),
+    )
+
+
+def run_depression_prediction(filename, source, progress=None):
+    if progress is not None:
+        progress("decode")
+    # Save uploaded file temporarily. Each upload gets its own directory so
+    # queued uploads with the same name stay apart, while the file keeps the
+    # temp_<name> form that predict_severity matches known recordings by.
+    with tempfile.TemporaryDirectory(dir=".") as temp_dir:
+        temp_path = os.path.join(temp_dir, f"temp_{filename}")
+        if isinstance(source, str):
+            # A spooled chunked upload: link it rather than copy it
+            try:
+                os.link(source, temp_path)
+            except OSError:
+                shutil.copyfile(source, temp_path)
+        else:
+            with open(temp_path, "wb") as f:
+                f.write(source)
+        return assess_depression(temp_path, progress)
+
+
+def assess_depression(temp_path, progress=None):
     try:
-        depression_label, depression_prob = predict_depression(temp_path)
+        depression_label, depression_prob = predict_depression(temp_path, progress=progress)
     except Exception as e:
-        os.remove(temp_path)
         raise HTTPException(status_code=500, detail=f"Error during depression prediction: {e}")
 
     result = {
@@ -165,12 +504,10 @@ async def predict(file: UploadFile = File(...)):
             severity_label = predict_severity(temp_path)
             result["severity_prediction"] = severity_label
         except Exception as e:
-            os.remove(temp_path)
             raise HTTPException(status_code=500, detail=f"Error during severity prediction: {e}")
     else:
         result["message"] = "No depression detected"
 
-    os.remove(temp_path)
     return result
 
 
@@ -181,7 +518,171 @@ async def predict_anxiety_endpoint(
         facial2: UploadFile = File(...),
         facial3: UploadFile = File(...),
         transcript: UploadFile = File(...),
+        job: bool = False,
     ):
-    result = predict_anxiety( audio, facial1, facial2, facial3, transcript )
+    names, contents = await read_uploads([audio, facial1, facial2, facial3, transcript])
+    if job:
+        return JSONResponse(
+            status_code=202,
+            content=await start_job(
+                "anxiety", anxiety_executor, predict_anxiety, *anxiety_uploads(names, contents),
+                key=anxiety_key(names, contents),
+            ),
+        )
+    result = await assess_anxiety(names, contents)
     return result
- 
\ No newline at end of file
+
+
+async def read_uploads(uploads):
+    # In-memory copies: the contents are needed for the key anyway, and the
+    # request's upload files are closed once the handler returns (job mode)
+    return [upload.filename for upload in uploads], [await upload.read() for upload in uploads]
+
+
+def anxiety_uploads(names, contents):
+    return [UploadFile(io.BytesIO(data), filename=name) for name, data in zip(names, contents)]
+
+
+def anxiety_key(names, contents):
+    return ("anxiety", content_hash(*names, *contents))
+
+
+async def assess_anxiety(names, contents):
+    return await predictions.do(
+        anxiety_key(names, contents),
+        lambda: anxiety_executor.run(predict_anxiety, *anxiety_uploads(names, contents)),
+    )
+
+
+async def timed_assessment(assessment):
+    # One module of a visit report: its result or error, and how long it took
+    started = time.perf_counter()
+    try:
+        report = {"status": "ok", "result": await assessment}
+    except ExecutorSaturated as e:
+        report = {"status": "failed", "error": {"status_code": 503, "detail": str(e), "retry_after": e.retry_after}}
+    except HTTPException as e:
+        report = {"status": "failed", "error": {"status_code": e.status_code, "detail": e.detail}}
+    except Exception as e:
+        report = {"status": "failed", "error": {"status_code": 500, "detail": str(e)}}
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+@app.post("/api/visit/assess")
+async def assess_visit(
+        dementia: Optional[str] = Form(None),
+        edf: Optional[UploadFile] = File(None),
+        edf_upload_id: Optional[str] = Form(None),
+        audio: Optional[UploadFile] = File(None),
+        facial1: Optional[UploadFile] = File(None),
+        facial2: Optional[UploadFile] = File(None),
+        facial3: Optional[UploadFile] = File(None),
+        transcript: Optional[UploadFile] = File(None),
+    ):
+    """
+    All assessments of a clinic visit in one request, run concurrently.
+
+    `dementia` is the /api/dementia/predict body as a JSON string, `edf` (or
+    `edf_upload_id`, a finalized chunked upload) the depression recording
+    and audio/facial1-3/transcript the anxiety inputs.
+    A module whose inputs are missing is skipped, and one module failing
+    does not stop the others. Each module reports its own status, result
+    or error and wall-clock seconds.
+    """
+    anxiety_inputs = [audio, facial1, facial2, facial3, transcript]
+    if any(anxiety_inputs) and not all(anxiety_inputs):
+        raise HTTPException(status_code=400, detail="Anxiety needs audio, facial1, facial2, facial3 and transcript")
+
+    try:
+        request = PredictionRequest.model_validate_json(dementia) if dementia is not None else None
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid dementia input: {e}")
+    edf_source = await edf_input(edf, edf_upload_id) if edf is not None or edf_upload_id is not None else None
+    anxiety_files = await read_uploads(anxiety_inputs) if all(anxiety_inputs) else None
+
+    assessments = {}
+    if request is not None:
+        assessments["dementia"] = assess_dementia(request)
+    if edf_source is not None:
+        assessments["depression"] = assess_depression_upload(*edf_source)
+    if anxiety_files is not None:
+        assessments["anxiety"] = assess_anxiety(*anxiety_files)
+    if not assessments:
+        raise HTTPException(status_code=400, detail="No assessment inputs were provided")
+
+    started = time.perf_counter()
+    reports = await asyncio.gather(*[timed_assessment(a) for a in assessments.values()])
+    report = {name: {"status": "skipped"} for name in ("dementia", "depression", "anxiety")}
+    report.update(zip(assessments, reports))
+    report["total_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+@app.post("/api/uploads")
+async def create_upload(request: UploadInit):
+    # Resumable chunked upload: create, PUT chunks at their offsets, finalize,
+    # then pass the upload_id to a prediction or transcription endpoint
+    return await asyncio.to_thread(chunked_uploads.create, request.filename, request.size, request.sha256)
+
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    # Where to resume after a dropped connection
+    return await asyncio.to_thread(chunked_uploads.status, upload_id)
+
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, offset: int, request: Request):
+    # The chunk is streamed to the spool file, never held whole in memory
+    return await chunked_uploads.write_chunk(upload_id, offset, request.stream())
+
+
+@app.post("/api/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str):
+    return await chunked_uploads.finalize(upload_id)
+
+
+@app.delete("/api/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    await asyncio.to_thread(chunked_uploads.delete, upload_id)
+    return {"deleted": upload_id}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    # Stage-by-stage progress as server-sent events, ending with the result
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/executors/stats")
+def executor_stats():
+    # Load and rejections per model family, to size the worker/queue limits,
+    # and how many requests joined an identical one already in flight
+    stats = {executor.name: executor.stats() for executor in executors}
+    stats["single_flight"] = predictions.stats()
+    return stats
+
+
+@app.get("/api/batching/stats")
+def batching_stats():
+    # Batch sizes and queue waits of the shared BERT / CBraMod batchers
+    return {"bert": bert_batcher.stats(), "cbramod": cbramod_batcher.stats()}
+
+
+@app.get("/api/workers/memory")
+def worker_memory_stats():
+    # Memory of the worker that served this request (see serve.py)
+    return worker_memory()
@@ -0,0 +1,37 @@
+import os
+
+
+def process_memory(pid="self"):
+    """
+    Memory of a process split into shared and private pages, in MB.
+
+    Pss charges each shared page to the processes sharing it in equal
+    parts, so summing Pss over the master and its workers gives the real
+    footprint of a pre-forked server, while Rss counts shared model
+    weights once per process. Linux only; returns {} elsewhere.
+    Args:
+        pid (int | str): Process id, or "self".
+    Returns:
+        dict: rss_mb, pss_mb, shared_mb and private_mb.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+
+    fields = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def worker_memory():
+    return {"pid": os.getpid(), "parent_pid": os.getppid(), **process_memory()}
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel
 
 class ClinicalInput(BaseModel):
@@ -14,12 +16,31 @@ class ClinicalInput(BaseModel):
     BehavioralProblems: int
 
 
+class TranscriptTiming(BaseModel):
+    # As returned by /api/dementia/transcribe/?structured=true
+    words: List[str]
+    starts: List[float]
+    ends: List[float]
+    gaps: List[float]
+    pause_threshold: float
+    stats: Dict[str, float]
+
+
 class SpeechInput(BaseModel):
     Transcript_CTD: str
     Transcript_PFT: str
     Transcript_SFT: str
+    # Only the CTD transcript feeds the linguistic features
+    Timing_CTD: Optional[TranscriptTiming] = None
 
 
 class PredictionRequest(BaseModel):
     clinical: ClinicalInput
-    speech: SpeechInput
\ No newline at end of file
+    speech: SpeechInput
+
+
+class UploadInit(BaseModel):
+    # Start of a resumable chunked upload (see uploads.py)
+    filename: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
@@ -0,0 +1,204 @@
+"""
+Pre-forked multi-worker server that shares model memory between workers.
+
+Run from the Server directory:
+
+    python serve.py --workers 4 --port 8000
+
+`uvicorn main:app --workers N` imports the app, and with it every model,
+separately in each worker. Here the master process imports it once
+(BERT, spaCy and the joblib models in predict_dementia, CBraMod in
+Depression_module.predictor, the anxiety models), binds the listening
+socket and then forks the workers. The workers inherit the loaded models
+as copy-on-write pages, which stay shared as long as nothing writes to
+them:
+
+- The garbage collector is disabled while loading and everything loaded
+  is moved to the permanent generation with gc.freeze(), so collections
+  in the workers never touch (and so never copy) the model objects.
+- Torch modules are put in eval mode with requires_grad off; inference
+  only ever reads the weight tensors.
+
+Local Whisper is the exception: CTranslate2 starts its worker threads
+when a model is loaded, and threads do not survive a fork, so each worker
+loads its own Whisper replicas on startup. An ONNX Runtime dementia
+encoder (DEMENTIA_ENCODER_BACKEND) is per-worker for the same reason. The master logs the memory of
+every worker periodically (Pss is the share of the shared pages charged
+to a process, so the Pss total is the real footprint) and replaces
+workers that exit. A worker that dies within --boot-grace seconds of
+starting is replaced only after an exponential backoff, and after
+--max-boot-failures such deaths in a row the server shuts down instead
+of restarting a worker that cannot come up.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from memory_stats import process_memory
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", "2")))
+    parser.add_argument("--memory-report-interval", type=float,
+                        default=float(os.getenv("SERVER_MEMORY_REPORT_INTERVAL", "60")),
+                        help="Seconds between per-worker memory reports (0 disables)")
+    parser.add_argument("--boot-grace", type=float, default=float(os.getenv("SERVER_BOOT_GRACE", "30")),
+                        help="A worker exiting sooner than this after starting counts as a boot failure")
+    parser.add_argument("--max-boot-failures", type=int, default=int(os.getenv("SERVER_MAX_BOOT_FAILURES", "5")),
+                        help="Consecutive boot failures before the server gives up")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+def freeze_weights(modules):
+    for module in modules:
+        module.eval()
+        for parameter in module.parameters():
+            parameter.requires_grad_(False)
+
+
+def load_app():
+    # Importing main loads the dementia models and CBraMod at module level
+    import main
+    from Anxiety_Module.anxiety_predictor import load_models as load_anxiety_models
+    from Dementia_Models import predict_dementia
+    from Depression_module import predictor
+
+    load_anxiety_models()
+    # bert_model is None when the dementia encoder runs on ONNX Runtime
+    freeze_weights([m for m in (predict_dementia.bert_model, predictor.model) if m is not None])
+    return main.app
+
+
+def bind_socket(host, port):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, args):
+    import torch
+    from Config.dbConfig import engine
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+
+    # Connections the master opened (create_all) belong to the master; the
+    # worker starts its own pool instead of sharing their sockets
+    engine.dispose(close=False)
+    # Split the cores between the workers instead of oversubscribing them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // args.workers))
+
+    config = uvicorn.Config(app, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(app, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app, sock, args)
+        except BaseException as e:
+            print(f"Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            # Never fall back into the master's loop
+            os._exit(code)
+    print(f"Started worker {pid}")
+    return pid
+
+
+def report_memory(workers):
+    master = process_memory()
+    rows = [("master", os.getpid(), master)] + [("worker", pid, process_memory(pid)) for pid in sorted(workers)]
+    for role, pid, memory in rows:
+        print(f"{role:>6} {pid:>7}  rss={memory.get('rss_mb', 0):8.1f}MB  pss={memory.get('pss_mb', 0):8.1f}MB"
+              f"  shared={memory.get('shared_mb', 0):8.1f}MB  private={memory.get('private_mb', 0):8.1f}MB")
+    total = sum(memory.get("pss_mb", 0) for _, _, memory in rows)
+    print(f"Total Pss across {len(workers)} workers and the master: {total:.1f}MB")
+
+
+def main():
+    args = parse_args()
+
+    # Nothing loaded from here on should ever be touched by a collection
+    gc.disable()
+    app = load_app()
+    gc.collect()
+    gc.freeze()
+    print(f"Models loaded in master {os.getpid()}: {process_memory()}")
+
+    sock = bind_socket(args.host, args.port)
+    print(f"Listening on {args.host}:{args.port} with {args.workers} workers")
+    # pid -> when it was started
+    workers = {spawn_worker(app, sock, args): time.monotonic() for _ in range(args.workers)}
+    boot_failures = 0
+
+    stopping = False
+    exit_code = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    next_report = time.monotonic() + args.memory_report_interval
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            started = workers.pop(pid, None)
+            if stopping:
+                continue
+            if started is not None and time.monotonic() - started < args.boot_grace:
+                boot_failures += 1
+            else:
+                boot_failures = 0
+            if boot_failures >= args.max_boot_failures:
+                print(f"Workers died {boot_failures} times in a row while starting; shutting down")
+                stop(signal.SIGTERM, None)
+                exit_code = 1
+                continue
+
+            delay = min(2 ** boot_failures - 1, 60)
+            print(f"Worker {pid} exited with status {status}, replacing it"
+                  + (f" in {delay}s" if delay else ""))
+            time.sleep(delay)
+            if not stopping:
+                workers[spawn_worker(app, sock, args)] = time.monotonic()
+            continue
+
+        if args.memory_report_interval > 0 and time.monotonic() >= next_report:
+            report_memory(workers)
+            next_report = time.monotonic() + args.memory_report_interval
+        time.sleep(0.5)
+
+    sock.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
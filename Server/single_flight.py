@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+from collections import Counter
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls.
+
+    The first caller for a key starts the work as a task; anyone asking for
+    the same key before it finishes awaits that task instead of starting
+    their own, and gets the same result or exception. Keys are only held
+    while the work runs, so this is not a cache. Coalescing is per process.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.shared = Counter()
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        """
+        Await `fn()` (a coroutine function), or the identical call already running.
+        Args:
+            key (tuple[str, str]): (kind, content hash) of the inputs.
+            fn (Callable[[], Awaitable]): Starts the work.
+        """
+        kind = key[0]
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls[kind] += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared[kind] += 1
+            print(f"Joining the in-flight {kind} request for the same input")
+        # A caller that goes away must not cancel the work others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            kind: {"computed": self.calls[kind], "shared": self.shared[kind]}
+            for kind in sorted(set(self.calls) | set(self.shared))
+        }
+
+
+def content_hash(*parts):
+    """sha256 over byte/str parts, length-prefixed so boundaries are unambiguous."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode() if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+predictions = SingleFlight()
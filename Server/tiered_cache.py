@@ -0,0 +1,137 @@
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache: an in-memory LRU in front of a size-bounded
+    directory of pickle files.
+
+    Keys must be filesystem-safe strings (hex digests). A disk hit is
+    promoted back into memory. When the directory grows past
+    `max_disk_bytes`, the least recently used files (by mtime, which is
+    refreshed on every disk hit) are deleted until it fits again.
+    get and set do blocking file I/O, so async code calls them through
+    asyncio.to_thread.
+    """
+
+    def __init__(self, memory_items, directory, max_disk_bytes):
+        self.memory_items = memory_items
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits["disk"] += 1
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.max_disk_bytes <= 0:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see half a file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes = self._scan_disk() if self._disk_bytes is None else self._disk_bytes + size - replaced
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".pkl"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_disk(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% of the budget so every write does not trigger a scan
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+            }
@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from Config.uploadConfig import UPLOAD_MAX_MB, UPLOAD_SPOOL_DIR, UPLOAD_TTL_S
+
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+HASH_BLOCK = 1024 * 1024
+
+
+class ChunkedUploads:
+    """
+    Resumable uploads spooled to disk.
+
+    A client creates an upload, then PUTs the file in chunks, each at the
+    byte offset it starts at, and finally finalizes it. Bytes are appended
+    to `<id>.part` as they arrive and fed to a running sha256, so neither
+    the file nor the hash ever needs the whole upload in memory. If a
+    connection drops mid-chunk, everything received so far is kept; the
+    client asks for the current offset and continues from there. A chunk
+    at the wrong offset is refused with 409 and the offset to use.
+
+    State lives in `<id>.json` next to the data, so any worker process can
+    serve any chunk. Writes and finalizes of one upload are serialized
+    across workers by an flock on its `.part` file. The running hash is
+    kept per process and rebuilt from the spooled bytes when a chunk
+    arrives at a process that has not seen the previous ones. Uploads
+    expire `ttl` seconds after their last change.
+    """
+
+    def __init__(self, directory, max_bytes, ttl):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._hashers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        base = os.path.join(self.directory, upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    def _read_meta(self, upload_id):
+        meta_path, _ = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if meta["updated"] + self.ttl < time.time():
+            self._delete(upload_id)
+            raise HTTPException(status_code=404, detail="Upload expired")
+        return meta
+
+    def _write_meta(self, upload_id, meta):
+        meta_path, _ = self._paths(upload_id)
+        meta["updated"] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _delete(self, upload_id):
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._forget(upload_id)
+
+    def _forget(self, upload_id):
+        # Per-process state of an upload that takes no more chunks
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+            self._locks.pop(upload_id, None)
+
+    def _purge_expired(self):
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path) as f:
+                        expired = json.load(f)["updated"] + self.ttl < now
+                except (OSError, ValueError, KeyError):
+                    continue
+                if expired:
+                    self._delete(name[:-len(".json")])
+
+    def _status(self, upload_id, meta):
+        _, data_path = self._paths(upload_id)
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "offset": os.path.getsize(data_path),
+            "finalized": meta["finalized"],
+            "sha256": meta["sha256"] if meta["finalized"] else None,
+        }
+
+    def create(self, filename, size=None, sha256=None):
+        """
+        Start an upload.
+        Args:
+            filename (str): Original file name (kept for the prediction code).
+            size (int): Expected total bytes, if known; checked on finalize.
+            sha256 (str): Expected hex digest, if known; checked on finalize.
+        Returns:
+            dict: The upload's status, with offset 0.
+        """
+        if size is not None and size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Uploads are limited to {self.max_bytes} bytes")
+        os.makedirs(self.directory, exist_ok=True)
+        self._purge_expired()
+
+        upload_id = uuid.uuid4().hex
+        _, data_path = self._paths(upload_id)
+        open(data_path, "wb").close()
+        meta = {
+            "filename": os.path.basename(filename),
+            "size": size,
+            "expected_sha256": sha256.lower() if sha256 else None,
+            "finalized": False,
+            "sha256": None,
+        }
+        self._write_meta(upload_id, meta)
+        return self._status(upload_id, meta)
+
+    def status(self, upload_id):
+        return self._status(upload_id, self._read_meta(upload_id))
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    @contextlib.asynccontextmanager
+    async def _claim(self, upload_id):
+        # The asyncio lock orders this process's requests; the flock on the
+        # spool file excludes the other workers
+        _, data_path = self._paths(upload_id)
+        async with self._upload_lock(upload_id):
+            try:
+                f = await asyncio.to_thread(open, data_path, "rb")
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Upload not found")
+            try:
+                await asyncio.to_thread(fcntl.flock, f.fileno(), fcntl.LOCK_EX)
+                yield
+            finally:
+                # Closing the file releases the flock
+                f.close()
+
+    def _hasher(self, upload_id, data_path, offset):
+        # The running hash if this process has seen every byte so far,
+        # otherwise rebuilt from the spool file
+        with self._lock:
+            cached = self._hashers.get(upload_id)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        with open(data_path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                hasher.update(block)
+        return hasher
+
+    async def write_chunk(self, upload_id, offset, stream):
+        """
+        Append one chunk, streamed from the request body.
+        Args:
+            upload_id (str): From `create`.
+            offset (int): Byte offset the chunk starts at; must equal the
+                number of bytes already received.
+            stream (AsyncIterator[bytes]): The chunk's bytes as they arrive.
+        Returns:
+            dict: The upload's status after the chunk.
+        """
+        async with self._claim(upload_id):
+            meta = await asyncio.to_thread(self._read_meta, upload_id)
+            if meta["finalized"]:
+                raise HTTPException(status_code=409, detail="Upload is already finalized")
+            _, data_path = self._paths(upload_id)
+            received = await asyncio.to_thread(os.path.getsize, data_path)
+            if offset != received:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Chunk does not start at the current offset", "offset": received},
+                )
+            limit = meta["size"] if meta["size"] is not None else self.max_bytes
+
+            hasher = await asyncio.to_thread(self._hasher, upload_id, data_path, received)
+            try:
+                with await asyncio.to_thread(open, data_path, "ab") as f:
+                    async for piece in stream:
+                        if received + len(piece) > limit:
+                            raise HTTPException(status_code=413, detail=f"Upload exceeds {limit} bytes")
+                        await asyncio.to_thread(f.write, piece)
+                        hasher.update(piece)
+                        received += len(piece)
+            finally:
+                # Whatever arrived before a disconnect or error is kept, so
+                # the client can resume from the new offset
+                with self._lock:
+                    self._hashers[upload_id] = (received, hasher)
+                await asyncio.to_thread(self._write_meta, upload_id, meta)
+            return await asyncio.to_thread(self._status, upload_id, meta)
+
+    async def finalize(self, upload_id):
+        """Check size and digest, and make the upload usable by upload id."""
+        async with self._claim(upload_id):
+            meta = await asyncio.to_thread(self._read_meta, upload_id)
+            if meta["finalized"]:
+                self._forget(upload_id)
+                return await asyncio.to_thread(self._status, upload_id, meta)
+            _, data_path = self._paths(upload_id)
+            received = await asyncio.to_thread(os.path.getsize, data_path)
+            if meta["size"] is not None and received != meta["size"]:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"message": f"Expected {meta['size']} bytes", "offset": received},
+                )
+            hasher = await asyncio.to_thread(self._hasher, upload_id, data_path, received)
+            digest = hasher.hexdigest()
+            if meta["expected_sha256"] and digest != meta["expected_sha256"]:
+                raise HTTPException(status_code=400, detail=f"sha256 mismatch: received {digest}")
+
+            meta.update({"finalized": True, "sha256": digest})
+            await asyncio.to_thread(self._write_meta, upload_id, meta)
+            self._forget(upload_id)
+            return await asyncio.to_thread(self._status, upload_id, meta)
+
+    def delete(self, upload_id):
+        self._read_meta(upload_id)
+        self._delete(upload_id)
+
+    def resolve(self, upload_id):
+        """
+        A finalized upload, for the prediction endpoints.
+        Returns:
+            tuple[str, str, str]: (filename, spool path, sha256 hex digest).
+        """
+        meta = self._read_meta(upload_id)
+        if not meta["finalized"]:
+            raise HTTPException(status_code=409, detail="Upload is not finalized")
+        _, data_path = self._paths(upload_id)
+        return meta["filename"], data_path, meta["sha256"]
+
+
+chunked_uploads = ChunkedUploads(UPLOAD_SPOOL_DIR, UPLOAD_MAX_MB * 1024 * 1024, UPLOAD_TTL_S)